@@ -1,57 +1,187 @@
 import random
-import copy
+import threading
+import time
+import instrument
+import opening_book
+import ttt_table
 from tic_tac_toe import TicTacToe
 from connect_four import ConnectFour
+from evaluator import get_evaluator
+from mcts import MCTS
+from search import NegamaxSearch
+from transposition import TranspositionTable, EXACT, perspective_key
 
 
+@instrument.measured("get_move", "choose_move")
 class AIPlayer:
-    def __init__(self, difficulty="easy"):
+    def __init__(self, difficulty="easy", time_budget=0.8, node_budget=None, table_size=1 << 17,
+                 book_path=opening_book.DEFAULT_PATH, workers=1, table=None):
         self.difficulty = difficulty
-
+        # Connect Four opening book; None (or a missing file) means always search.
+        self.book_path = book_path
+        # Lives as long as the bot, so later turns reuse positions searched
+        # earlier. A SharedTranspositionTable passed in is shared with bots in
+        # other processes too.
+        self.table = table if table is not None else TranspositionTable(table_size)
+        self.search = NegamaxSearch(self._evaluate_board, time_budget, node_budget, self.table, self._root_bias)
+        # _minimax() stores exhaustive scores relative to the node, not the
+        # search's depths and mate scores, so it keeps them in a table of its own.
+        self.minimax_table = TranspositionTable(table_size)
+        # The "mcts" difficulty plays Monte Carlo tree search instead, with
+        # node_budget counting rollouts; it keeps its tree between turns.
+        self.mcts = MCTS(time_budget, node_budget, workers=workers) if difficulty == "mcts" else None
+        # Depth, node count and speed of the most recent search, if any.
+        self.last_search = None
+        # Whether the last Connect Four move came from the opening book.
+        self.used_book = False
+
+        # Pondering: a background thread that works out the bot's answers
+        # to the opponent's likely moves while the opponent thinks.
+        # position key -> (move, last_search, used_book), each found with the
+        # full search budget.
+        self.pondered = {}
+        # Seconds pondered before the last move, if that move was pondered.
+        self.pondered_for = None
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._ponder_key = None
+        self._ponder_start = 0.0
+
+    @instrument.profiled
     def get_move(self, game_instance):
-        if isinstance(game_instance, TicTacToe):
-            bot_symbol = "X" if game_instance.turn == 1 else "O"
-            opp_symbol = "O" if bot_symbol == "X" else "X"
-            return self._get_ttt_move(game_instance, bot_symbol, opp_symbol)
-
-        elif isinstance(game_instance, ConnectFour):
-            bot_symbol = "X" if game_instance.turn == 1 else "O"
-            opp_symbol = "O" if bot_symbol == "X" else "X"
-            return self._get_c4_move(game_instance, bot_symbol, opp_symbol)
-
-        return None
+        """Returns the bot's move as the input text make_move() expects, or None."""
+        pondered = self.stop_pondering()
+        answer = self.pondered.get(game_instance.hash())
+        self.pondered.clear()
+        if answer:
+            move, self.last_search, self.used_book = answer
+            self.pondered_for = pondered
+        else:
+            move = self.choose_move(game_instance)
+            self.pondered_for = None
+        if instrument.enabled:
+            instrument.count("ponder_hits" if answer else "ponder_misses")
+            search = self.last_search or {}
+            instrument.count("bot_moves")
+            instrument.count("search_nodes", search.get("nodes", search.get("iterations", 0)))
+            instrument.event("bot_move", difficulty=self.difficulty, move=move, book=self.used_book,
+                             search=self.last_search)
+        if move is None:
+            return None
 
-    def _get_ttt_move(self, game, bot_symbol, opp_symbol):
-        empty_cells = []
-        for y in range(3):
-            for x in range(3):
-                if game.board[y][x] == " ":
-                    empty_cells.append((x, y))
+        if isinstance(game_instance, TicTacToe):
+            y, x = divmod(move, game_instance.size)
+            return f"{x} {y}"
+        return str(move)
 
-        if not empty_cells:
+    def choose_move(self, game_instance):
+        """Returns the bot's move in the form legal_moves() uses, or None if there is none."""
+        moves = game_instance.legal_moves()
+        if not moves:
             return None
 
         if self.difficulty == "easy":
-            x, y = random.choice(empty_cells)
-            return f"{x} {y}"
-
-        best_score = -float('inf')
-        best_move = random.choice(empty_cells)
+            return random.choice(moves)
 
-        for (x, y) in empty_cells:
-            game.board[y][x] = bot_symbol
-            game.moves_count += 1
+        if self.mcts:
+            move = self.mcts.best_move(game_instance)
+            self.last_search = self.mcts.stats()
+            return move
 
-            score = self._minimax(game, 0, False, bot_symbol, opp_symbol)
+        bot_symbol = "X" if game_instance.turn == 1 else "O"
+        opp_symbol = "O" if bot_symbol == "X" else "X"
 
-            game.board[y][x] = " "
-            game.moves_count -= 1
+        if isinstance(game_instance, TicTacToe) and game_instance.size == 3 and game_instance.win_length == 3:
+            x, y, _ = ttt_table.lookup(game_instance.board)
+            return y * 3 + x
 
-            if score > best_score:
-                best_score = score
-                best_move = (x, y)
+        elif isinstance(game_instance, TicTacToe):
+            move = self.search.best_move(game_instance, bot_symbol, opp_symbol)
+            self.last_search = self.search.stats()
+            return move
 
-        return f"{best_move[0]} {best_move[1]}"
+        elif isinstance(game_instance, ConnectFour):
+            book = opening_book.get_book(self.book_path) if self.book_path else None
+            col = book.lookup(game_instance) if book else None
+            self.used_book = col is not None
+            if self.used_book:
+                self.last_search = None
+                return col
+
+            col = self.search.best_move(game_instance, bot_symbol, opp_symbol)
+            self.last_search = self.search.stats()
+            return col
+
+        return random.choice(moves)
+
+    def start_pondering(self, game):
+        """
+        Starts searching, in a background thread, the positions the opponent
+        (to move in `game`) can reach, most likely replies first. get_move()
+        then answers a pondered position instantly.
+        """
+        if self.difficulty == "easy" or game.is_terminal():
+            return
+        key = game.hash()
+        if self._ponder_thread and self._ponder_key == key:
+            return
+        self.stop_pondering()
+
+        self._ponder_key = key
+        self._ponder_stop = threading.Event()
+        self._ponder_start = time.perf_counter()
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(game.clone(), self._ponder_stop),
+                                               daemon=True)
+        self._ponder_thread.start()
+
+    def stop_pondering(self):
+        """Cancels pondering, keeping what is finished. Returns the seconds spent pondering."""
+        if not self._ponder_thread:
+            return 0.0
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        seconds = time.perf_counter() - self._ponder_start
+        if instrument.enabled:
+            instrument.observe("AIPlayer.ponder", seconds)
+        return seconds
+
+    def close(self):
+        """Stops pondering and the MCTS worker processes, if any."""
+        self.stop_pondering()
+        if self.mcts:
+            self.mcts.close()
+
+    def _ponder(self, game, stop):
+        self.pondered.clear()
+        self.search.stop = stop
+        if self.mcts:
+            self.mcts.stop = stop
+        try:
+            for reply in self._likely_replies(game):
+                game.apply(reply)
+                if not game.is_terminal():
+                    answer = self.choose_move(game)
+                    # A search cut short by stop would be weaker than a real one.
+                    if stop.is_set():
+                        break
+                    self.pondered[game.hash()] = (answer, self.last_search, self.used_book)
+                game.undo()
+        finally:
+            self.search.stop = None
+            if self.mcts:
+                self.mcts.stop = None
+
+    def _likely_replies(self, game):
+        # The reply the bot's own search expects comes first: the
+        # transposition table holds it from the search of the bot's last move.
+        moves = game.search_moves() if hasattr(game, "search_moves") else game.legal_moves()
+        bot_symbol = "O" if game.turn == 1 else "X"
+        entry = self.table.lookup(game.hash() ^ perspective_key(bot_symbol))
+        if entry is not None and entry[3] in moves:
+            moves.remove(entry[3])
+            moves.insert(0, entry[3])
+        return moves
 
     def _minimax(self, game, depth, is_maximizing, bot_symbol, opp_symbol):
         winner = game.check_winner()
@@ -59,154 +189,45 @@ class AIPlayer:
             return 10 - depth
         if winner == opp_symbol:
             return depth - 10
-        if game.moves_count == 9:
+        if winner == "Tie":
             return 0
 
-        if is_maximizing:
-            best_score = -float('inf')
-            for y in range(3):
-                for x in range(3):
-                    if game.board[y][x] == " ":
-                        game.board[y][x] = bot_symbol
-                        game.moves_count += 1
-                        score = self._minimax(game, depth + 1, False, bot_symbol, opp_symbol)
-                        game.board[y][x] = " "
-                        game.moves_count -= 1
-                        best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for y in range(3):
-                for x in range(3):
-                    if game.board[y][x] == " ":
-                        game.board[y][x] = opp_symbol
-                        game.moves_count += 1
-                        score = self._minimax(game, depth + 1, True, bot_symbol, opp_symbol)
-                        game.board[y][x] = " "
-                        game.moves_count -= 1
-                        best_score = min(score, best_score)
-            return best_score
-
-    def _get_c4_move(self, game, bot_symbol, opp_symbol):
-        valid_cols = []
-        for col in range(game.cols):
-            if game.board[0][col] == " ":
-                valid_cols.append(col)
-
-        if not valid_cols:
-            return None
-
-        if self.difficulty == "easy":
-            return str(random.choice(valid_cols))
-
-        winning_cols = self._get_winning_cols(game, valid_cols, bot_symbol)
-        if winning_cols:
-            return str(winning_cols[0])
-
-        opp_winning_cols = self._get_winning_cols(game, valid_cols, opp_symbol)
-        if opp_winning_cols:
-            return str(opp_winning_cols[0])
-
-        best_score = -float('inf')
-        best_col = random.choice(valid_cols)
-
-        for col in valid_cols:
-            score = self._score_c4_move(game, col, bot_symbol, opp_symbol)
-            score += random.random()
-
-            if score > best_score:
-                best_score = score
-                best_col = col
-
-        return str(best_col)
-
-    def _get_winning_cols(self, game, candidates, symbol):
-        winning = []
-        target_winner_str = "Player 1" if symbol == "X" else "Player 2"
-
-        for col in candidates:
-            row = self._get_next_open_row(game, col)
-            if row is None:
-                continue
-
-            game.board[row][col] = symbol
-            game.moves_count += 1
-
-            if game.check_winner() == target_winner_str:
-                winning.append(col)
-
-            game.board[row][col] = " "
-            game.moves_count -= 1
-
-        return winning
-
-    def _score_c4_move(self, game, col, bot_symbol, opp_symbol):
-        temp_game = copy.deepcopy(game)
-
-        if not self._simulate_drop(temp_game, col, bot_symbol):
-            return -float('inf')
-
-        next_valid_cols = []
-        for c in range(temp_game.cols):
-            if temp_game.board[0][c] == " ":
-                next_valid_cols.append(c)
-
-        if self._get_winning_cols(temp_game, next_valid_cols, opp_symbol):
-            return -100000
-
-        score = 0
-        center_col = game.cols // 2
-        dist = abs(col - center_col)
-        score -= dist * 4
-        score += self._evaluate_board(temp_game, bot_symbol, opp_symbol)
+        # The search is exhaustive, so every cached score is exact. Scores
+        # are stored relative to this node since they shrink with depth.
+        key = game.hash() ^ perspective_key(bot_symbol)
+        entry = self.minimax_table.lookup(key)
+        if entry is not None:
+            stored = entry[1]
+            if stored > 0:
+                return stored - depth
+            if stored < 0:
+                return stored + depth
+            return 0
 
-        return score
+        scores = []
+        for move in game.legal_moves():
+            game.apply(move)
+            scores.append(self._minimax(game, depth + 1, not is_maximizing, bot_symbol, opp_symbol))
+            game.undo()
+        best_score = max(scores) if is_maximizing else min(scores)
+
+        if best_score > 0:
+            stored = best_score + depth
+        elif best_score < 0:
+            stored = best_score - depth
+        else:
+            stored = 0
+        self.minimax_table.store(key, len(scores), stored, EXACT)
+        return best_score
 
-    def _simulate_drop(self, game, col, symbol):
-        row = self._get_next_open_row(game, col)
-        if row is None:
-            return False
-        game.board[row][col] = symbol
-        game.moves_count += 1
-        return True
+    def _root_bias(self, game, move):
+        # The evaluation has no center term, so Connect Four root moves are
+        # nudged toward the middle column instead.
+        if isinstance(game, ConnectFour):
+            return abs(move - game.cols // 2) * 4
+        return 0
 
     def _evaluate_board(self, game, bot_symbol, opp_symbol):
-        score = 0
-        for r in range(game.rows):
-            for c in range(game.cols - 3):
-                window = game.board[r][c:c + 4]
-                score += self._evaluate_window(window, bot_symbol, opp_symbol)
-        for c in range(game.cols):
-            col_array = [game.board[r][c] for r in range(game.rows)]
-            for r in range(game.rows - 3):
-                window = col_array[r:r + 4]
-                score += self._evaluate_window(window, bot_symbol, opp_symbol)
-        for r in range(game.rows - 3):
-            for c in range(game.cols - 3):
-                w1 = [game.board[r + i][c + i] for i in range(4)]
-                score += self._evaluate_window(w1, bot_symbol, opp_symbol)
-                w2 = [game.board[r + 3 - i][c + i] for i in range(4)]
-                score += self._evaluate_window(w2, bot_symbol, opp_symbol)
-        return score
-
-    def _evaluate_window(self, window, bot_symbol, opp_symbol):
-        score = 0
-
-        if window.count(bot_symbol) == 3 and window.count(" ") == 1:
-            score += 5
-        elif window.count(bot_symbol) == 2 and window.count(" ") == 2:
-            score += 2
-
-        if window.count(opp_symbol) == 3 and window.count(" ") == 1:
-            score -= 80
-
-        elif window.count(opp_symbol) == 2 and window.count(" ") == 2:
-            score -= 10
-
-        return score
-
-    def _get_next_open_row(self, game, col):
-        for r in range(game.rows - 1, -1, -1):
-            if game.board[r][col] == " ":
-                return r
-        return None
\ No newline at end of file
+        # Scores every win_length window of the board; see evaluator.py.
+        evaluator = get_evaluator(game.rows, game.cols, game.win_length)
+        return evaluator.evaluate(game.cells, 1 if bot_symbol == "X" else 2)
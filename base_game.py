@@ -1,15 +1,64 @@
 from abc import ABC, abstractmethod
 
+# Cell codes used by the flat boards: 0 empty, 1 first player, 2 second player.
+PIECE_SYMBOLS = (" ", "X", "O")
+
+
+class BoardView:
+    """
+    Read-only rows x cols view of a flat board for rendering: view[r][c] is
+    the symbol of cell r * cols + c. Rows are built on access, so search code
+    should read the flat cells directly instead.
+    """
+    __slots__ = ("cells", "cols", "symbols")
+
+    def __init__(self, cells, cols, symbols=PIECE_SYMBOLS):
+        self.cells = cells
+        self.cols = cols
+        self.symbols = symbols
+
+    def __len__(self):
+        return len(self.cells) // self.cols
+
+    def __getitem__(self, row):
+        if not 0 <= row < len(self):
+            raise IndexError("board row out of range")
+        start = row * self.cols
+        return tuple([self.symbols[code] for code in self.cells[start:start + self.cols]])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def tolist(self):
+        return [list(row) for row in self]
+
 
 class BoardGame(ABC):
     """
     Abstract Base Class that defines the interface for all board games.
+
+    Games have two layers. The pure state API (legal_moves, apply, undo,
+    clone, is_terminal, hash) does no I/O and no input parsing, and is what
+    search and simulation code call in tight loops. The interactive methods
+    (display_board, make_move) are thin adapters on top of it for the
+    terminal UI.
+
+    Games keep their state in __slots__ and flat bytearrays so that clones
+    are cheap and millions of positions fit in memory; `board` is only a
+    read-only 2D view of that state.
     """
+    __slots__ = ("turn", "moves_count", "history")
 
     def __init__(self):
-        self.board = []
         self.turn = 1  # 1 for Player 1, -1 for Player 2
         self.moves_count = 0
+        self.history = []  # moves passed to apply(), for undo()
+
+    @property
+    def board(self):
+        """Read-only 2D view of the board (rows of symbols), for rendering."""
+        return ()
 
     @abstractmethod
     def display_board(self, console):
@@ -19,7 +68,7 @@ class BoardGame(ABC):
     @abstractmethod
     def make_move(self, move_input):
         """
-        Processes a player's move.
+        Processes a player's move from user input text and passes the turn.
         Returns True if the move was valid and successful, False otherwise.
         """
         pass
@@ -35,6 +84,37 @@ class BoardGame(ABC):
         """
         pass
 
+    @abstractmethod
+    def legal_moves(self):
+        """Returns the moves the side to move may play, or [] once the game is over."""
+        pass
+
+    @abstractmethod
+    def apply(self, move):
+        """
+        Plays `move` (one of legal_moves()) for the side to move and passes
+        the turn as the rules say. Does no validation and no I/O.
+        """
+        pass
+
+    @abstractmethod
+    def undo(self):
+        """Takes back the most recent apply()."""
+        pass
+
+    @abstractmethod
+    def clone(self):
+        """Returns an independent copy of the game state."""
+        pass
+
+    @abstractmethod
+    def hash(self):
+        """Returns an integer key identifying the current position."""
+        pass
+
+    def is_terminal(self):
+        return self.check_winner() is not None
+
     def switch_turn(self):
         """Switches the turn between players."""
-        self.turn *= -1
\ No newline at end of file
+        self.turn *= -1
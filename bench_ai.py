@@ -0,0 +1,218 @@
+"""
+AI benchmark suite.
+
+    python bench_ai.py --output results.json
+    python bench_ai.py --baseline results.json --latency-threshold 0.25
+
+Asks every bot difficulty for a move on a fixed corpus of Tic Tac Toe and
+Connect Four positions (empty board, mid-game and near the end) and reports,
+per position and difficulty:
+
+    latency   p50 / p95 / max milliseconds per move over --repeats fresh bots
+    nodes     positions searched per move (MCTS: random playouts)
+    memory    peak KiB allocated while choosing the move, and KiB still held
+              by the bot afterwards (traced in a separate run, since
+              tracemalloc slows everything down)
+
+Bots search to fixed node budgets with the opening book off, so the moves and
+node counts are reproducible and latency measures speed. --output writes the
+results as JSON. --baseline compares against an earlier output and exits with
+status 1 if any metric got worse by more than its threshold.
+
+bench_ai_baseline.json holds reference results at the default settings.
+Nodes and memory carry over between machines; latencies do not, so compare
+those against a baseline written on the same machine (or pass
+--latency-threshold inf).
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from ai_player import AIPlayer
+
+GAMES = {
+    "tictactoe": TicTacToe,
+    "connect4": ConnectFour,
+}
+
+# (name, game, moves played from the empty board).
+POSITIONS = (
+    ("ttt-empty", "tictactoe", []),
+    ("ttt-mid", "tictactoe", [4, 0, 8]),
+    ("ttt-late", "tictactoe", [4, 0, 8, 2, 1, 7, 6]),
+    ("c4-empty", "connect4", []),
+    ("c4-mid", "connect4", [3, 3, 2, 4, 4, 2, 3, 5]),
+    ("c4-late", "connect4", [3, 0, 1, 4, 0, 5, 5, 3, 6, 0, 4, 1, 0, 2, 3, 4, 5,
+                             6, 4, 3, 5, 6, 0, 4, 3, 0, 3, 5, 4, 6, 6, 6, 1, 1]),
+)
+
+DIFFICULTIES = ("easy", "hard", "mcts")
+
+# Metrics compared against the baseline (all lower is better), by threshold.
+METRICS = {
+    "latency": ("p50_ms", "p95_ms"),
+    "nodes": ("nodes",),
+    "memory": ("peak_kib",),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def setup(game_name, moves):
+    game = GAMES[game_name]()
+    for move in moves:
+        game.apply(move)
+    return game
+
+
+def new_bot(difficulty, args):
+    budget = args.rollouts if difficulty == "mcts" else args.node_budget
+    return AIPlayer(difficulty, None, budget, book_path=None)
+
+
+def play(game_name, moves, difficulty, args, seed):
+    random.seed(seed)
+    game = setup(game_name, moves)
+    bot = new_bot(difficulty, args)
+    start = time.perf_counter()
+    move = bot.choose_move(game)
+    elapsed = time.perf_counter() - start
+
+    stats = bot.last_search or {}
+    nodes = stats.get("iterations", stats.get("nodes", 0))
+    bot.close()
+    return move, elapsed, nodes
+
+
+def measure(game_name, moves, difficulty, args):
+    play(game_name, moves, difficulty, args, args.seed)  # warm-up: imports, lookup tables
+
+    latencies = []
+    nodes = []
+    chosen = []
+    for i in range(args.repeats):
+        move, elapsed, count = play(game_name, moves, difficulty, args, args.seed + i)
+        latencies.append(elapsed * 1000)
+        nodes.append(count)
+        chosen.append(move)
+
+    # Memory in a separate run: what the bot allocates at its peak while
+    # choosing the move, and what it still holds afterwards (mostly caches).
+    random.seed(args.seed)
+    game = setup(game_name, moves)
+    tracemalloc.start()
+    bot = new_bot(difficulty, args)
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    bot.choose_move(game)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bot.close()
+
+    return {
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "max_ms": max(latencies),
+        "nodes": sum(nodes) / len(nodes),
+        "peak_kib": (peak - base) / 1024,
+        "retained_kib": (current - base) / 1024,
+        "moves": chosen,
+    }
+
+
+def run(args):
+    results = []
+    for name, game_name, moves in POSITIONS:
+        for difficulty in args.difficulties:
+            result = {"position": name, "game": game_name, "difficulty": difficulty}
+            result.update(measure(game_name, moves, difficulty, args))
+            results.append(result)
+            print(f"{name:<10} {difficulty:<5} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                  f"{result['max_ms']:>9.2f} {result['nodes']:>9,.0f} {result['peak_kib']:>9,.0f} "
+                  f"{result['retained_kib']:>9,.0f}")
+            sys.stdout.flush()
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"repeats": args.repeats, "node_budget": args.node_budget,
+                     "rollouts": args.rollouts, "seed": args.seed},
+        "results": results,
+    }
+
+
+def compare(report, baseline, thresholds, min_ms):
+    """Returns a description of every metric that regressed past its threshold."""
+    old = {(r["position"], r["difficulty"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = old.get((result["position"], result["difficulty"]))
+        if before is None:
+            continue
+        for group, metrics in METRICS.items():
+            for metric in metrics:
+                new_value, old_value = result[metric], before[metric]
+                # Sub-millisecond timings are mostly noise.
+                if metric.endswith("_ms") and new_value < min_ms:
+                    continue
+                if new_value > old_value * (1 + thresholds[group]) and new_value > old_value:
+                    change = f"+{new_value / old_value - 1:.0%}" if old_value else "was 0"
+                    regressions.append(f"{result['position']} {result['difficulty']} {metric}: "
+                                       f"{old_value:,.2f} -> {new_value:,.2f} "
+                                       f"({change}, threshold {thresholds[group]:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bots on a fixed set of positions.")
+    parser.add_argument("--repeats", type=int, default=5, help="timed moves per position and difficulty")
+    parser.add_argument("--node-budget", type=int, default=20000, help="search nodes per hard move")
+    parser.add_argument("--rollouts", type=int, default=2000, help="random playouts per MCTS move")
+    parser.add_argument("--difficulties", nargs="+", default=list(DIFFICULTIES), choices=DIFFICULTIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--latency-threshold", type=float, default=0.25,
+                        help="allowed p50/p95 slowdown, as a fraction (default 0.25)")
+    parser.add_argument("--nodes-threshold", type=float, default=0.10,
+                        help="allowed increase in nodes per move (default 0.10)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="allowed increase in peak memory per move (default 0.25)")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="ignore latency regressions of moves faster than this")
+    args = parser.parse_args(argv)
+
+    print(f"{'position':<10} {'bot':<5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'nodes':>9} "
+          f"{'peak KiB':>9} {'held KiB':>9}")
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        thresholds = {"latency": args.latency_threshold, "nodes": args.nodes_threshold,
+                      "memory": args.memory_threshold}
+        regressions = compare(report, baseline, thresholds, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
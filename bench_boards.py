@@ -0,0 +1,126 @@
+"""
+Board layout benchmark.
+
+    python bench_boards.py --positions 100000
+
+Compares the game state layout (__slots__ plus flat bytearrays) with the
+previous one (a __dict__ instance holding lists of lists of one-character
+strings and, for Memory, lists of lists of bools) on midgame positions of
+each board game: memory per instance, measured with tracemalloc over
+`--positions` clones kept alive, and the time of one clone().
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from memory_game import MemoryGame
+
+# Random moves played from the start to reach a midgame position.
+MIDGAME_MOVES = {TicTacToe: 4, ConnectFour: 20, MemoryGame: 6}
+
+# Read-only tables that clones share instead of copying.
+SHARED = ("zobrist",)
+
+
+class ListLayout:
+    """The same state in the old layout, cloned the way the old clone() did."""
+
+    def __init__(self, game):
+        for cls in type(game).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                setattr(self, name, getattr(game, name))
+
+        if isinstance(game, MemoryGame):
+            cols = game.cols
+            self.board = game.board.tolist()
+            self.revealed = [[bool(game.revealed[r * cols + c]) for c in range(cols)] for r in range(game.rows)]
+            del self.cards
+        else:
+            self.board = game.board.tolist()
+            del self.cells
+
+        # attribute -> copy function, for everything clone() has to copy.
+        copiers = {}
+        for name, value in vars(self).items():
+            if name in SHARED:
+                continue
+            if isinstance(value, dict):
+                copiers[name] = dict
+            elif isinstance(value, list):
+                copiers[name] = _copy_rows if value and isinstance(value[0], list) else list
+        self._copiers = copiers
+
+    def clone(self):
+        other = ListLayout.__new__(ListLayout)
+        copiers = self._copiers
+        for name, value in vars(self).items():
+            copy = copiers.get(name)
+            setattr(other, name, copy(value) if copy else value)
+        return other
+
+
+def _copy_rows(rows):
+    return [list(row) for row in rows]
+
+
+def midgame(game_cls, rng):
+    while True:
+        game = game_cls()
+        for _ in range(MIDGAME_MOVES[game_cls]):
+            game.apply(rng.choice(game.legal_moves()))
+            if game.is_terminal():
+                break
+        else:
+            return game
+
+
+def bytes_per_instance(state, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clones = [state.clone() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the clones isn't part of an instance.
+    return (after - before) / count - 8 * len(clones) / count
+
+
+def clone_seconds(state, count):
+    clone = state.clone
+    start = time.perf_counter()
+    for _ in range(count):
+        clone()
+    return (time.perf_counter() - start) / count
+
+
+def run(positions=100000, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for game_cls in MIDGAME_MOVES:
+        game = midgame(game_cls, rng)
+        for layout, state in (("lists", ListLayout(game)), ("bytearray", game)):
+            results.append({
+                "game": game_cls.__name__,
+                "layout": layout,
+                "bytes": bytes_per_instance(state, positions),
+                "clone_us": clone_seconds(state, positions) * 1e6,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory and clone cost of board layouts.")
+    parser.add_argument("--positions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'game':<12} {'layout':<10} {'bytes/instance':>15} {'clone':>10}")
+    for result in run(args.positions, args.seed):
+        print(f"{result['game']:<12} {result['layout']:<10} {result['bytes']:>15,.0f} "
+              f"{result['clone_us']:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Monte Carlo tree search scaling benchmark.
+
+    python bench_mcts.py --seconds 2 --workers 1 2 4 8
+
+Runs the MCTS bot on a few fixed positions with a time budget, once per
+worker count, and reports rollouts per second and the speedup over one
+process. Root parallelization only scales with free CPU cores.
+"""
+import argparse
+import os
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from mcts import MCTS
+
+# (name, game factory, moves played before the search).
+POSITIONS = (
+    ("tictactoe", TicTacToe, [4]),
+    ("connect4 opening", ConnectFour, []),
+    ("connect4 midgame", ConnectFour, [3, 3, 2, 4, 4, 2, 3, 5]),
+    ("connect5 8x8", lambda: ConnectFour(8, 8, 5), [3, 4, 3]),
+    ("gomoku 9x9", lambda: TicTacToe(9, 5), [40, 41]),
+)
+
+
+def measure(factory, moves, workers, seconds, seed):
+    game = factory()
+    for move in moves:
+        game.apply(move)
+    search = MCTS(seconds, workers=workers, seed=seed)
+    try:
+        move = search.best_move(game)
+        return move, search.stats()
+    finally:
+        search.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCTS rollouts per second by worker count.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="search time per position")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'position':<18} {'workers':>7} {'move':>5} {'rollouts':>9} {'rollouts/s':>11} {'speedup':>8}")
+    for name, factory, moves in POSITIONS:
+        base = None
+        for workers in args.workers:
+            move, stats = measure(factory, moves, workers, args.seconds, args.seed)
+            base = base or stats["ips"]
+            print(f"{name:<18} {workers:>7} {move:>5} {stats['iterations']:>9,} {stats['ips']:>11,.0f} "
+                  f"{stats['ips'] / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
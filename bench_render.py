@@ -0,0 +1,66 @@
+"""
+Redraw benchmark.
+
+    python bench_render.py --games 20
+
+Replays seeded random games of every game through render.Screen into an
+in-memory terminal, once with full clear-and-reprint frames (what the game
+loop used to do) and once redrawing only the changed lines, and reports the
+frame time and the bytes written per frame for both.
+"""
+import argparse
+import io
+import random
+
+from rich.align import Align
+from rich.console import Console
+from rich.panel import Panel
+from rich.text import Text
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from blackjack import Blackjack
+from memory_game import MemoryGame
+from render import Screen
+
+GAMES = (TicTacToe, ConnectFour, Blackjack, MemoryGame)
+
+
+def replay(game_cls, diff, games, seed, width=100, height=50):
+    console = Console(file=io.StringIO(), force_terminal=True, width=width, height=height,
+                      color_system="truecolor")
+    screen = Screen(console, diff=diff)
+    title = Text(f"Starting {game_cls.__name__}!", style="bold cyan")
+
+    for i in range(games):
+        random.seed(seed + i)
+        game = game_cls()
+
+        def paint(target):
+            target.print(Align.center(Panel(title, expand=False)))
+            game.display_board(target)
+
+        screen.invalidate()  # every game starts from a cleared screen
+        screen.draw(paint)
+        while not game.is_terminal():
+            game.apply(random.choice(game.legal_moves()))
+            screen.draw(paint)
+    return screen.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and diff-based redraws.")
+    parser.add_argument("--games", type=int, default=20, help="games replayed per game type")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'game':<12} {'redraw':<6} {'frames':>7} {'ms/frame':>9} {'bytes/frame':>12}")
+    for game_cls in GAMES:
+        for diff in (False, True):
+            stats = replay(game_cls, diff, args.games, args.seed)
+            print(f"{game_cls.__name__:<12} {'diff' if diff else 'full':<6} {stats['frames']:>7} "
+                  f"{stats['ms_per_frame']:>9.2f} {stats['bytes_per_frame']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Shared transposition table benchmark.
+
+    python bench_tt.py --games 64 --workers 4 --node-budget 5000
+
+Plays hard-vs-hard Connect Four self-play games in a process pool, twice:
+once with a private transposition table in every worker process (kept for
+all of that worker's games), and once with one SharedTranspositionTable used
+by all workers. Every game starts with a few random moves so the games
+differ, and both runs play the same openings.
+
+Reports games per second, the average depth the searches reached within
+their node budget (a better cache lets the same budget see deeper), the
+cache hit rate, and the peak memory of the worker processes.
+"""
+import argparse
+import os
+import random
+import resource
+import time
+from multiprocessing import Pool
+
+from connect_four import ConnectFour
+from ai_player import AIPlayer
+from transposition import TranspositionTable, SharedTranspositionTable
+
+_table = None
+
+
+def _init_worker(table, capacity):
+    global _table
+    _table = table if table is not None else TranspositionTable(capacity)
+
+
+def play_games(task):
+    seed, games, opening, node_budget = task
+    rng = random.Random(seed)
+    hits, misses = _table.hits, _table.misses
+    moves = depth = 0
+    for _ in range(games):
+        game = ConnectFour()
+        for _ in range(opening):
+            game.apply(rng.choice(game.legal_moves()))
+        bots = (AIPlayer("hard", None, node_budget, book_path=None, table=_table),
+                AIPlayer("hard", None, node_budget, book_path=None, table=_table))
+        while not game.is_terminal():
+            bot = bots[0] if game.turn == 1 else bots[1]
+            game.apply(bot.choose_move(game))
+            moves += 1
+            depth += bot.last_search["depth"]
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return os.getpid(), games, moves, depth, _table.hits - hits, _table.misses - misses, peak_kib
+
+
+def run(shared, args):
+    table = SharedTranspositionTable(args.capacity) if shared else None
+    per_task = max(1, args.games // (args.workers * 4))
+    tasks = []
+    for i in range(0, args.games, per_task):
+        tasks.append((args.seed + i, min(per_task, args.games - i), args.opening, args.node_budget))
+
+    totals = [0, 0, 0, 0, 0]
+    peaks = {}
+    start = time.perf_counter()
+    try:
+        with Pool(args.workers, _init_worker, (table, args.capacity)) as pool:
+            for pid, *counts, peak_kib in pool.imap_unordered(play_games, tasks):
+                for i, count in enumerate(counts):
+                    totals[i] += count
+                peaks[pid] = peak_kib
+    finally:
+        if table:
+            table.close()
+    elapsed = time.perf_counter() - start
+
+    games, moves, depth, hits, misses = totals
+    return {
+        "games_per_sec": games / elapsed,
+        "avg_depth": depth / moves if moves else 0.0,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "worker_mib": sum(peaks.values()) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-process and shared transposition tables.")
+    parser.add_argument("--games", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--node-budget", type=int, default=5000, help="search nodes per move")
+    parser.add_argument("--opening", type=int, default=4, help="random moves at the start of every game")
+    parser.add_argument("--capacity", type=int, default=1 << 20, help="table entries")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.games} games, {args.workers} workers, {args.node_budget:,} nodes per move")
+    print(f"{'table':<12} {'games/s':>8} {'avg depth':>10} {'hit rate':>9} {'worker MiB':>11}")
+    for shared in (False, True):
+        result = run(shared, args)
+        print(f"{'shared' if shared else 'per-process':<12} {result['games_per_sec']:>8.2f} "
+              f"{result['avg_depth']:>10.2f} {result['hit_rate']:>9.1%} {result['worker_mib']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
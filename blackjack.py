@@ -5,26 +5,135 @@ from rich.panel import Panel
 from rich.columns import Columns
 from rich.align import Align
 from rich.text import Text
+import instrument
 from base_game import BoardGame
 
+SUITS = ['♠', '♥', '♦', '♣']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+# Aces count 11 here and drop to 1 while the hand would otherwise bust.
+RANK_VALUES = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9,
+               '10': 10, 'J': 10, 'Q': 10, 'K': 10, 'A': 11}
+BUST_LIMIT = 21
+DEALER_STANDS_ON = 17
+
+# Cards are ints 0-51: suit index * 13 + rank index.
+CARD_VALUES = [RANK_VALUES[rank] for _ in SUITS for rank in RANKS]
+ACE_VALUE = RANK_VALUES['A']
+
+
+def card_rank(card):
+    return RANKS[card % 13]
+
+
+def card_suit(card):
+    return SUITS[card // 13]
+
+
+def settle(player_score, dealer_score):
+    """
+    Numeric form of Blackjack.check_winner for a finished hand:
+    1 if the player wins, -1 if the dealer wins, 0 for a tie.
+    """
+    if player_score > BUST_LIMIT:
+        return -1
+    if dealer_score > BUST_LIMIT or player_score > dealer_score:
+        return 1
+    if dealer_score > player_score:
+        return -1
+    return 0
+
+
+def _card_panel(content, style):
+    return Panel(
+        Align.center(content, vertical="middle"),
+        width=6,
+        height=3,
+        style=style,
+        box=box.ROUNDED,
+        padding=(0, 0)
+    )
+
+
+def _face_panel(card):
+    suit = card_suit(card)
+    if suit in ['♥', '♦']:
+        txt_style = "bold red"
+    else:
+        txt_style = "bold black"
+    content = Text(f"{card_rank(card)}{suit}", justify="center", style=txt_style)
+    return _card_panel(content, "black on bright_white")
+
+
+# Card panels are built once and reused on every redraw.
+CARD_PANELS = [_face_panel(card) for card in range(len(CARD_VALUES))]
+HIDDEN_CARD_PANEL = _card_panel(Text("❔", justify="center"), "blue on bright_white")
+
+
+class Hand:
+    """
+    A hand of cards whose score is updated as each card is added, instead of
+    being recounted from every card on each check.
+    """
+    __slots__ = ("cards", "total", "soft_aces")
 
-class Blackjack(BoardGame):
     def __init__(self):
+        self.cards = []
+        self.total = 0
+        self.soft_aces = 0  # aces still counted as 11
+
+    def add(self, card):
+        value = CARD_VALUES[card]
+        self.cards.append(card)
+        self.total += value
+        if value == ACE_VALUE:
+            self.soft_aces += 1
+
+        # At most two aces ever need to drop to 1 after a single card.
+        while self.total > BUST_LIMIT and self.soft_aces > 0:
+            self.total -= 10
+            self.soft_aces -= 1
+
+    @property
+    def score(self):
+        return self.total
+
+    def copy(self):
+        hand = Hand()
+        hand.cards = list(self.cards)
+        hand.total = self.total
+        hand.soft_aces = self.soft_aces
+        return hand
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+
+@instrument.measured("check_winner", "make_move", "display_board")
+class Blackjack(BoardGame):
+    __slots__ = ("deck", "player_hand", "dealer_hand", "game_over", "show_odds", "seed", "rng")
+
+    def __init__(self, show_odds=False, seed=None):
         super().__init__()
+        # Every shuffle comes from this seed, so a game can be replayed exactly.
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
         self.deck = self._create_deck()
-        self.player_hand = []
-        self.dealer_hand = []
+        self.player_hand = Hand()
+        self.dealer_hand = Hand()
         self.game_over = False
-        self.player_hand.append(self._deal_card())
-        self.dealer_hand.append(self._deal_card())
-        self.player_hand.append(self._deal_card())
-        self.dealer_hand.append(self._deal_card())
+        # Show the exact odds of hitting and standing under the hands.
+        self.show_odds = show_odds
+        self.player_hand.add(self._deal_card())
+        self.dealer_hand.add(self._deal_card())
+        self.player_hand.add(self._deal_card())
+        self.dealer_hand.add(self._deal_card())
 
     def _create_deck(self):
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        deck = [{'rank': rank, 'suit': suit} for suit in suits for rank in ranks]
-        random.shuffle(deck)
+        deck = list(range(len(CARD_VALUES)))
+        self.rng.shuffle(deck)
         return deck
 
     def _deal_card(self):
@@ -32,62 +141,10 @@ class Blackjack(BoardGame):
             self.deck = self._create_deck()
         return self.deck.pop()
 
-    def _calculate_score(self, hand):
-        score = 0
-        aces = 0
-        for card in hand:
-            rank = card['rank']
-            if rank in ['J', 'Q', 'K']:
-                score += 10
-            elif rank == 'A':
-                aces += 1
-                score += 11
-            else:
-                score += int(rank)
-
-        while score > 21 and aces > 0:
-            score -= 10
-            aces -= 1
-        return score
-
     def _get_hand_renderables(self, hand, hide_first=False):
-        cards_renderables = []
-
-        for i, card in enumerate(hand):
-            if hide_first and i == 0:
-                text_content = Text("❔", justify="center")
-
-                card_panel = Panel(
-                    Align.center(text_content, vertical="middle"),
-                    width=6,
-                    height=3,
-                    style="blue on bright_white",
-                    box=box.ROUNDED,
-                    padding=(0, 0)
-                )
-                cards_renderables.append(card_panel)
-                continue
-
-            rank = card['rank']
-            suit = card['suit']
-
-            if suit in ['♥', '♦']:
-                txt_style = "bold red"
-            else:
-                txt_style = "bold black"
-
-            content = Text(f"{rank}{suit}", justify="center", style=txt_style)
-
-            card_panel = Panel(
-                Align.center(content, vertical="middle"),
-                width=6,
-                height=3,
-                style="black on bright_white",
-                box=box.ROUNDED,
-                padding=(0, 0)
-            )
-            cards_renderables.append(card_panel)
-
+        cards_renderables = [CARD_PANELS[card] for card in hand]
+        if hide_first and cards_renderables:
+            cards_renderables[0] = HIDDEN_CARD_PANEL
         return cards_renderables
 
     def display_board(self, console):
@@ -95,7 +152,7 @@ class Blackjack(BoardGame):
         layout_table.add_column(justify="center")
 
         if self.game_over:
-            d_score = self._calculate_score(self.dealer_hand)
+            d_score = self.dealer_hand.score
             dealer_title = f"[bold white]Dealer's Hand (Score: {d_score})[/]"
         else:
             dealer_title = "[bold white]Dealer's Hand[/]"
@@ -107,7 +164,7 @@ class Blackjack(BoardGame):
 
         layout_table.add_row("")
 
-        p_score = self._calculate_score(self.player_hand)
+        p_score = self.player_hand.score
         player_title = f"[bold white]Your Hand (Score: {p_score})[/]"
 
         player_cards = self._get_hand_renderables(self.player_hand)
@@ -115,31 +172,87 @@ class Blackjack(BoardGame):
         layout_table.add_row(player_title)
         layout_table.add_row(Columns(player_cards, align="center"))
 
+        if self.show_odds and not self.game_over:
+            layout_table.add_row(self._odds_panel())
+
         console.print(Panel(layout_table, border_style="blue"))
 
+    def _odds_panel(self):
+        # Imported here: blackjack_odds builds on this module.
+        import blackjack_odds
+
+        # Only from the cards the player can see; the later states of the
+        # hand are in the odds caches already, so redraws are instant.
+        odds = blackjack_odds.game_odds(self)
+        best = "Hit" if odds["best"] == "hit" else "Stand"
+        text = (f"Stand: [bold]{odds['stand']:+.3f}[/]   Hit: [bold]{odds['hit']:+.3f}[/]   "
+                f"Best: [bold green]{best}[/]   Dealer busts: {odds['dealer']['bust']:.0%}")
+        return Panel(text, title="Odds (expected result per hand)", border_style="dim", expand=False)
+
     def make_move(self, move_input):
         move = move_input.strip().lower()
+        if move not in self.legal_moves():
+            return False
+        self.apply(move)
+        return True
+
+    def legal_moves(self):
+        """Moves are 'h' (hit) and 's' (stand)."""
+        if self.game_over:
+            return []
+        return ['h', 's']
+
+    def apply(self, move):
+        # Dealing is random, so undo() restores a snapshot instead of replaying.
+        self.history.append((move, list(self.deck), self.player_hand.copy(), self.dealer_hand.copy(),
+                             self.rng.getstate()))
+        self.moves_count += 1
         if move == 'h':
-            self.player_hand.append(self._deal_card())
-            if self._calculate_score(self.player_hand) > 21:
+            self.player_hand.add(self._deal_card())
+            if self.player_hand.score > BUST_LIMIT:
                 self.game_over = True
-            return True
-        elif move == 's':
-            self.game_over = True
-            while self._calculate_score(self.dealer_hand) < 17:
-                self.dealer_hand.append(self._deal_card())
-            return True
         else:
-            return False
+            self.game_over = True
+            while self.dealer_hand.score < DEALER_STANDS_ON:
+                self.dealer_hand.add(self._deal_card())
+
+    def undo(self):
+        # Snapshots may be shared with clones, so restore copies of them.
+        _, deck, player_hand, dealer_hand, rng_state = self.history.pop()
+        self.deck = list(deck)
+        self.player_hand = player_hand.copy()
+        self.dealer_hand = dealer_hand.copy()
+        # A reshuffle after this point must deal the same cards again.
+        self.rng.setstate(rng_state)
+        self.game_over = False
+        self.moves_count -= 1
+
+    def clone(self):
+        game = Blackjack.__new__(Blackjack)
+        game.turn = self.turn
+        game.moves_count = self.moves_count
+        game.history = list(self.history)
+        game.deck = list(self.deck)
+        game.player_hand = self.player_hand.copy()
+        game.dealer_hand = self.dealer_hand.copy()
+        game.game_over = self.game_over
+        game.show_odds = self.show_odds
+        game.seed = self.seed
+        game.rng = random.Random()
+        game.rng.setstate(self.rng.getstate())
+        return game
+
+    def hash(self):
+        return hash((tuple(self.player_hand.cards), tuple(self.dealer_hand.cards), self.game_over))
 
     def check_winner(self):
         if not self.game_over:
             return None
-        p_score = self._calculate_score(self.player_hand)
-        d_score = self._calculate_score(self.dealer_hand)
-        if p_score > 21:
+        p_score = self.player_hand.score
+        d_score = self.dealer_hand.score
+        if p_score > BUST_LIMIT:
             return "Dealer (You Busted!)"
-        elif d_score > 21:
+        elif d_score > BUST_LIMIT:
             return "You (Dealer Busted!)"
         elif p_score > d_score:
             return "You"
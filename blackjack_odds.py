@@ -0,0 +1,235 @@
+"""
+Exact Blackjack odds.
+
+    python -m blackjack_odds --decks 1
+
+Works out, for the rules of the Blackjack game (dealer stands on all 17s, no
+doubling or splitting, results settled like check_winner), the exact
+probabilities of the dealer's final total and the player's expected value
+(EV) for standing and hitting, given the dealer's up-card and the cards not
+seen yet. The dealer's hole card is unseen, so it is drawn from those cards
+too.
+
+The cards not seen yet (the "shoe") are a count per card value, packed into
+one int with 8 bits per value, so a card is removed with a subtraction and
+the whole composition is a cheap cache key. The dealer's and the player's
+recursions are memoized on (hand, shoe) in bounded LRU caches.
+
+Run as a script, it prints a composition-dependent strategy table: hit or
+stand for every two-card player hand against every up-card, each worked out
+exactly with those three cards removed from the shoe.
+"""
+import argparse
+import time
+from functools import lru_cache
+
+from blackjack import RANKS, RANK_VALUES, ACE_VALUE, BUST_LIMIT, DEALER_STANDS_ON, CARD_VALUES
+
+# Card values 2-11 (ace as 11); a shoe holds the count of value v in bits 8 * (v - 2).
+VALUES = tuple(range(2, 12))
+FIELD = 8
+CACHE_SIZE = 1 << 18
+
+# Dealer outcomes: final totals 17-21, then bust.
+OUTCOMES = tuple(range(DEALER_STANDS_ON, BUST_LIMIT + 1)) + ("bust",)
+BUST = len(OUTCOMES) - 1
+
+
+def pack(counts):
+    """Packs {card value: count} into a shoe."""
+    shoe = 0
+    for value, count in counts.items():
+        shoe += count << FIELD * (value - 2)
+    return shoe
+
+
+def unpack(shoe):
+    return {value: (shoe >> FIELD * (value - 2)) & 0xFF for value in VALUES}
+
+
+def full_shoe(decks=1):
+    counts = {}
+    for rank in RANKS:
+        value = RANK_VALUES[rank]
+        counts[value] = counts.get(value, 0) + 4 * decks
+    return pack(counts)
+
+
+def remove(shoe, values):
+    """Takes cards (by value) out of a shoe."""
+    for value in values:
+        shoe -= 1 << FIELD * (value - 2)
+    return shoe
+
+
+def unseen_shoe(seen_cards, decks=1):
+    """The shoe of a game where `seen_cards` (0-51 card ids) have been seen."""
+    return remove(full_shoe(decks), [CARD_VALUES[card] for card in seen_cards])
+
+
+def _add(total, soft_aces, value):
+    # Same scoring as blackjack.Hand.add.
+    total += value
+    if value == ACE_VALUE:
+        soft_aces += 1
+    while total > BUST_LIMIT and soft_aces > 0:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces
+
+
+def _cards(shoe):
+    return sum((shoe >> shift) & 0xFF for shift in _SHIFTS)
+
+
+def _steps():
+    # For each (total, soft aces) a hand can stand on while drawing, every
+    # card it can draw: (bit shift, shoe decrement, new total, new soft aces).
+    steps = {}
+    for total in range(2, BUST_LIMIT + 1):
+        for soft_aces in (0, 1):
+            steps[total, soft_aces] = tuple(
+                (FIELD * (value - 2), 1 << FIELD * (value - 2)) + _add(total, soft_aces, value)
+                for value in VALUES)
+    return steps
+
+
+_SHIFTS = tuple(FIELD * (value - 2) for value in VALUES)
+_STEPS = _steps()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _dealer(total, soft_aces, shoe, cards):
+    if not cards:
+        # The game opens a fresh deck when the old one runs out.
+        shoe, cards = full_shoe(), 52
+    # Draws that end the dealer's hand are added up here rather than cached.
+    result = [0.0] * len(OUTCOMES)
+    for shift, one, new_total, new_soft in _STEPS[total, soft_aces]:
+        count = (shoe >> shift) & 0xFF
+        if not count:
+            continue
+        p = count / cards
+        if new_total > BUST_LIMIT:
+            result[BUST] += p
+        elif new_total >= DEALER_STANDS_ON:
+            result[new_total - DEALER_STANDS_ON] += p
+        else:
+            for i, q in enumerate(_dealer(new_total, new_soft, shoe - one, cards - 1)):
+                result[i] += p * q
+    return tuple(result)
+
+
+def dealer_distribution(up_value, shoe):
+    """
+    Returns the probabilities of the dealer finishing on 17, 18, 19, 20, 21
+    or busting (see OUTCOMES), with the hole card still to come from `shoe`.
+    """
+    return _dealer(*_add(0, 0, up_value), shoe, _cards(shoe))
+
+
+def stand_ev(player_total, up_value, shoe, cards=None):
+    """Expected result of standing (+1 win, 0 tie, -1 loss)."""
+    if player_total > BUST_LIMIT:
+        return -1.0
+    if cards is None:
+        cards = _cards(shoe)
+    dist = _dealer(*_add(0, 0, up_value), shoe, cards)
+    ev = dist[BUST]
+    for i, total in enumerate(OUTCOMES[:BUST]):
+        if total < player_total:
+            ev += dist[i]
+        elif total > player_total:
+            ev -= dist[i]
+    return ev
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _best(total, soft_aces, up_value, shoe, cards):
+    # Returns (stand EV, hit EV) from here, playing on perfectly after a hit.
+    stand = stand_ev(total, up_value, shoe, cards)
+    if total >= BUST_LIMIT and not soft_aces:
+        # A hard 21 busts on any card; a soft 21 cannot.
+        return stand, -1.0
+    if not cards:
+        shoe, cards = full_shoe(), 52
+    hit = 0.0
+    for shift, one, new_total, new_soft in _STEPS[total, soft_aces]:
+        count = (shoe >> shift) & 0xFF
+        if not count:
+            continue
+        p = count / cards
+        if new_total > BUST_LIMIT:
+            hit -= p
+        else:
+            hit += p * max(_best(new_total, new_soft, up_value, shoe - one, cards - 1))
+    return stand, hit
+
+
+def hand_odds(player_values, up_value, shoe):
+    """
+    Returns a dict with the dealer's outcome probabilities and the EVs of
+    standing and hitting (then playing on perfectly) for a player holding
+    cards of `player_values` against `up_value`, with `shoe` unseen.
+    """
+    total = soft_aces = 0
+    for value in player_values:
+        total, soft_aces = _add(total, soft_aces, value)
+    stand, hit = _best(total, soft_aces, up_value, shoe, _cards(shoe))
+    return {
+        "dealer": dict(zip(OUTCOMES, dealer_distribution(up_value, shoe))),
+        "stand": stand,
+        "hit": hit,
+        "best": "stand" if stand >= hit else "hit",
+    }
+
+
+def game_odds(game):
+    """hand_odds() for a Blackjack game in progress, from what the player can see."""
+    up = game.dealer_hand.cards[1]
+    seen = list(game.player_hand.cards) + [up]
+    values = [CARD_VALUES[card] for card in game.player_hand.cards]
+    return hand_odds(values, CARD_VALUES[up], unseen_shoe(seen))
+
+
+def strategy_table(decks=1):
+    """
+    Returns {(first value, second value): {up value: (best move, stand EV, hit EV)}}
+    for every two-card player hand, each decision worked out with the
+    player's cards and the up-card removed from a fresh `decks`-deck shoe.
+    """
+    shoe = full_shoe(decks)
+    hands = [(first, second) for i, first in enumerate(VALUES) for second in VALUES[i:]]
+    table = {hand: {} for hand in hands}
+    # Up-card by up-card, so the states the caches need at once stay few.
+    for up in VALUES:
+        for hand in hands:
+            odds = hand_odds(hand, up, remove(shoe, hand + (up,)))
+            table[hand][up] = (odds["best"], odds["stand"], odds["hit"])
+    return table
+
+
+def _label(value):
+    return "A" if value == 11 else str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the exact hit/stand strategy table.")
+    parser.add_argument("--decks", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = strategy_table(args.decks)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'hand':<6}" + "".join(f"{_label(up):>4}" for up in VALUES))
+    for (first, second), row in table.items():
+        cells = "".join(f"{row[up][0][0].upper():>4}" for up in VALUES)
+        print(f"{_label(first) + ',' + _label(second):<6}{cells}")
+    info = _best.cache_info()
+    print(f"\n{len(table)} hands x {len(VALUES)} up-cards in {elapsed:.2f}s "
+          f"({info.currsize:,} player states, {_dealer.cache_info().currsize:,} dealer states cached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,43 @@
+from functools import lru_cache
 from rich.table import Table
 from rich.align import Align
+from rich.text import Text
 from rich import box
-from base_game import BoardGame
+import instrument
+from base_game import BoardGame, BoardView
+from transposition import zobrist_table
 
+# Renderables reused on every redraw, indexed by cell code.
+CELL_TEXT = (Text(" "), Text("●", style="bold red"), Text("●", style="bold yellow"))
 
+
+@instrument.measured("check_winner", "make_move", "display_board")
 class ConnectFour(BoardGame):
-    def __init__(self):
+    __slots__ = ("rows", "cols", "win_length", "cells", "height", "masks", "heights", "winner", "zobrist", "key")
+
+    def __init__(self, rows=6, cols=7, win_length=4):
         super().__init__()
-        self.rows = 6
-        self.cols = 7
-        self.board = [[" " for _ in range(self.cols)] for _ in range(self.rows)]
-        self.moves_count = 0
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        # Cell row * cols + col (row 0 at the top) holds 0 (empty), 1 ("X") or 2 ("O").
+        self.cells = bytearray(self.rows * self.cols)
+
+        # Bitboard state: one mask per player (index 0 = "X", 1 = "O").
+        # Each column takes rows + 1 bits, bottom cell first; the spare top bit
+        # keeps shifted lines from wrapping into the next column.
+        self.height = self.rows + 1
+        self.masks = [0, 0]
+        self.heights = [c * self.height for c in range(self.cols)]
+        self.winner = None
+
+        # Zobrist hash of the position, updated on every drop/undo.
+        self.zobrist = zobrist_table("ConnectFour", self.cols * self.height)
+        self.key = 0
+
+    @property
+    def board(self):
+        return BoardView(self.cells, self.cols)
 
     def display_board(self, console):
         table = Table(box=box.ROUNDED, padding=(0, 1))
@@ -18,17 +45,9 @@ class ConnectFour(BoardGame):
         for i in range(self.cols):
             table.add_column(str(i), justify="center", style="bold white")
 
-        for row in self.board:
-            styled_row = []
-            for cell in row:
-                if cell == "X":
-                    styled_row.append("[bold red]●[/]")
-                elif cell == "O":
-                    styled_row.append("[bold yellow]●[/]")
-                else:
-                    styled_row.append(" ")
-
-            table.add_row(*styled_row)
+        cols = self.cols
+        for start in range(0, len(self.cells), cols):
+            table.add_row(*[CELL_TEXT[code] for code in self.cells[start:start + cols]])
 
         console.print(Align.center(table))
 
@@ -40,52 +59,127 @@ class ConnectFour(BoardGame):
                 print(f"Column must be between 0 and {self.cols - 1}.")
                 return False
 
-            for row in range(self.rows - 1, -1, -1):
-                if self.board[row][col] == " ":
-                    symbol = "X" if self.turn == 1 else "O"
-                    self.board[row][col] = symbol
-                    self.moves_count += 1
-                    return True
+            if not self.can_drop(col):
+                print("Column is full! Choose another one.")
+                return False
 
-            print("Column is full! Choose another one.")
-            return False
+            self.apply(col)
+            return True
 
         except ValueError:
-            print("Invalid input. Please enter a column number (0-6).")
+            print(f"Invalid input. Please enter a column number (0-{self.cols - 1}).")
             return False
 
-    def check_winner(self):
-        rows = self.rows
-        cols = self.cols
-        board = self.board
+    def can_drop(self, col):
+        return self.heights[col] < col * self.height + self.rows
+
+    def drop(self, col, symbol):
+        """
+        Drops a piece for `symbol` into `col` (which must not be full).
+        Returns the board row the piece landed in.
+        """
+        player = 0 if symbol == "X" else 1
+        bit = self.heights[col]
+        self.heights[col] += 1
+        self.masks[player] |= 1 << bit
+        self.key ^= self.zobrist[player][bit]
+        self.moves_count += 1
+
+        row = self.rows - 1 - (bit - col * self.height)
+        self.cells[row * self.cols + col] = player + 1
+
+        if self._completes_line(self.masks[player], bit):
+            self.winner = "Player 1" if player == 0 else "Player 2"
+        return row
+
+    def undo_drop(self, col):
+        """Removes the top piece of `col`, reverting a previous drop()."""
+        self.heights[col] -= 1
+        bit = self.heights[col]
+        player = 0 if self.masks[0] >> bit & 1 else 1
+        self.masks[player] &= ~(1 << bit)
+        self.key ^= self.zobrist[player][bit]
+        self.moves_count -= 1
+
+        row = self.rows - 1 - (bit - col * self.height)
+        self.cells[row * self.cols + col] = 0
+
+        # A finished game can't continue, so the undone piece was the winning one.
+        self.winner = None
+
+    def _completes_line(self, mask, bit):
+        # Walks both ways from the new piece along the vertical, horizontal and
+        # diagonal lines through it, so the check costs O(win_length) on any
+        # board size. The spare top bit of every column is always empty, which
+        # stops a walk at the board edge instead of wrapping to the next column.
+        need = self.win_length
+        for shift in (1, self.height, self.height - 1, self.height + 1):
+            run = 1
+            b = bit + shift
+            while run < need and mask >> b & 1:
+                run += 1
+                b += shift
+            b = bit - shift
+            while run < need and b >= 0 and mask >> b & 1:
+                run += 1
+                b -= shift
+            if run >= need:
+                return True
+        return False
+
+    def legal_moves(self):
+        """Moves are column numbers."""
+        if self.check_winner():
+            return []
+        return [col for col in range(self.cols) if self.can_drop(col)]
+
+    def search_moves(self):
+        """Playable columns, center first (central pieces take part in more lines)."""
+        return [col for col in _center_order(self.cols) if self.can_drop(col)]
+
+    def apply(self, move):
+        self.drop(move, "X" if self.turn == 1 else "O")
+        self.history.append(move)
+        self.switch_turn()
+
+    def undo(self):
+        self.undo_drop(self.history.pop())
+        self.switch_turn()
+
+    def clone(self):
+        game = ConnectFour.__new__(ConnectFour)
+        game.rows = self.rows
+        game.cols = self.cols
+        game.win_length = self.win_length
+        game.height = self.height
+        game.cells = bytearray(self.cells)
+        game.turn = self.turn
+        game.moves_count = self.moves_count
+        game.history = list(self.history)
+        game.masks = list(self.masks)
+        game.heights = list(self.heights)
+        game.winner = self.winner
+        game.zobrist = self.zobrist
+        game.key = self.key
+        return game
+
+    def hash(self):
+        return self.key
 
-        def get_winner_str(symbol):
-            return "Player 1" if symbol == "X" else "Player 2"
-
-        for r in range(rows):
-            for c in range(cols - 3):
-                if board[r][c] != " " and board[r][c] == board[r][c + 1] == board[r][c + 2] == board[r][c + 3]:
-                    return get_winner_str(board[r][c])
-
-        for r in range(rows - 3):
-            for c in range(cols):
-                if board[r][c] != " " and board[r][c] == board[r + 1][c] == board[r + 2][c] == board[r + 3][c]:
-                    return get_winner_str(board[r][c])
-
-        for r in range(3, rows):
-            for c in range(cols - 3):
-                if board[r][c] != " " and board[r][c] == board[r - 1][c + 1] == board[r - 2][c + 2] == board[r - 3][c + 3]:
-                    return get_winner_str(board[r][c])
-
-        for r in range(rows - 3):
-            for c in range(cols - 3):
-                if board[r][c] != " " and board[r][c] == board[r + 1][c + 1] == board[r + 2][c + 2] == board[r + 3][c + 3]:
-                    return get_winner_str(board[r][c])
+    def check_winner(self):
+        if self.winner:
+            return self.winner
 
-        if self.moves_count == rows * cols:
+        if self.moves_count == self.rows * self.cols:
             return "Tie"
 
         return None
 
     def switch_turn(self):
-        self.turn = 1 if self.turn == 2 else 2
\ No newline at end of file
+        self.turn = 1 if self.turn == 2 else 2
+
+
+@lru_cache(maxsize=None)
+def _center_order(cols):
+    center = cols // 2
+    return tuple(sorted(range(cols), key=lambda col: abs(col - center)))
@@ -0,0 +1,120 @@
+"""
+Line evaluation for the board game bots.
+
+A board is scored by looking at every window of `win_length` cells in a row
+(horizontal, vertical and both diagonals): the standard Connect Four board has
+69 of them. The windows of a board shape are computed once into a table of
+cell indexes, shape (windows, win_length), and every possible window content
+is scored once into a lookup table, so scoring a board is one gather and one
+lookup per window:
+
+    WindowEvaluator(6, 7, 4).evaluate(game.cells, bot=1)
+
+With NumPy installed, the gather and lookup are vectorized, and
+evaluate_batch() scores a whole batch of boards in one pass. Without it, both
+methods fall back to plain Python lookups.
+"""
+from functools import lru_cache
+from itertools import product
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def score_window(window, bot, opp):
+    """
+    Scores one window of cell codes (0 empty, 1 "X", 2 "O") for `bot`. One
+    piece short of a line scores 5 (-80 for the opponent's), two short scores
+    2 (-10), as long as the rest of the window is empty.
+    """
+    score = 0
+    n = len(window)
+
+    if window.count(bot) == n - 1 and window.count(0) == 1:
+        score += 5
+    elif window.count(bot) == n - 2 and window.count(0) == 2:
+        score += 2
+
+    if window.count(opp) == n - 1 and window.count(0) == 1:
+        score -= 80
+
+    elif window.count(opp) == n - 2 and window.count(0) == 2:
+        score -= 10
+
+    return score
+
+
+def window_table(rows, cols, n):
+    """Returns the flat cell indexes (row * cols + col) of every n-cell line on a rows x cols board."""
+    windows = []
+    for r in range(rows):
+        for c in range(cols - n + 1):
+            windows.append(tuple(r * cols + c + k for k in range(n)))
+    for r in range(rows - n + 1):
+        for c in range(cols):
+            windows.append(tuple((r + k) * cols + c for k in range(n)))
+    for r in range(rows - n + 1):
+        for c in range(cols - n + 1):
+            windows.append(tuple((r + k) * cols + c + k for k in range(n)))
+            windows.append(tuple((r + k) * cols + c + n - 1 - k for k in range(n)))
+    return windows
+
+
+class WindowEvaluator:
+    """
+    Scores boards of one shape. `windows` is the window table; `scores[bot]`
+    maps every window content (as a tuple of cell codes) to its score for
+    that player, and `codes[bot]` holds the same scores indexed by the
+    content read as a base-3 number, for the vectorized path.
+    """
+
+    def __init__(self, rows, cols, win_length):
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.windows = window_table(rows, cols, win_length)
+
+        # One itemgetter per window reads its cells as a tuple in a single C call.
+        self.getters = [itemgetter(*window) for window in self.windows]
+        contents = list(product(range(3), repeat=win_length))
+        self.scores = {bot: {content: score_window(content, bot, 3 - bot) for content in contents}
+                       for bot in (1, 2)}
+        # product() counts in base 3, so the content at position i has code i.
+        self.codes = {bot: [self.scores[bot][content] for content in contents] for bot in (1, 2)}
+
+        self.vectorized = np is not None and bool(self.windows)
+        if self.vectorized:
+            self.table = np.array(self.windows, dtype=np.intp)
+            self.powers = 3 ** np.arange(win_length - 1, -1, -1, dtype=np.intp)
+            self.code_scores = {bot: np.array(self.codes[bot], dtype=np.int64) for bot in (1, 2)}
+
+    def evaluate(self, cells, bot):
+        """Returns the score of one board (flat cell codes) for `bot` (1 or 2)."""
+        if self.vectorized:
+            codes = np.frombuffer(cells, dtype=np.uint8)[self.table] @ self.powers
+            return int(self.code_scores[bot][codes].sum())
+        scores = self.scores[bot]
+        return sum([scores[getter(cells)] for getter in self.getters])
+
+    def evaluate_batch(self, boards, bot):
+        """
+        Returns the scores of many boards for `bot`. `boards` is a sequence of
+        flat cell codes (or a NumPy array of shape (boards, cells)); with NumPy
+        the result is an int64 array, otherwise a list.
+        """
+        if not self.vectorized:
+            return [self.evaluate(cells, bot) for cells in boards]
+        if not isinstance(boards, np.ndarray):
+            boards = np.frombuffer(b"".join(boards), dtype=np.uint8).reshape(len(boards), self.rows * self.cols)
+        # (boards, windows, win_length) -> base-3 code of every window -> score.
+        codes = boards[:, self.table] @ self.powers
+        return self.code_scores[bot][codes].sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def get_evaluator(rows, cols, win_length):
+    """Returns the shared WindowEvaluator for a board shape."""
+    return WindowEvaluator(rows, cols, win_length)
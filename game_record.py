@@ -0,0 +1,420 @@
+"""
+Game records.
+
+    python -m game_record games.rec            # summary, and how fast it replays
+    python -m game_record games.rec --list 20  # the first 20 records
+
+Games are appended to a record file as they are played:
+
+    file     magic b"GREC", version
+    record   marker b"\xffREC", game type (uint8), 3 game parameters
+             (uint8), seed (uint64), both players' names (varint byte
+             length + UTF-8), the moves (varints of move code + 1), a 0
+             byte, the result (uint8, see RESULTS), and the CRC-32 of all
+             of the record before it (uint32)
+
+Move codes are small ints: the Tic Tac Toe cell, the Connect Four column,
+0/1 for Blackjack's hit/stand and first * cells + second for a Memory Game
+turn, so most moves take one byte. The parameters are the board size and
+win length, and the seed is the Blackjack or Memory Game shuffle; together
+with the moves they rebuild every position exactly.
+
+A record is only written as the game goes: the header when it starts, a move
+at a time, and the 0 byte and result when it ends, all through a write
+buffer that is flushed once per game. A record cut short (by a crash, or by
+another process appending to the same file) fails its CRC, and the reader
+skips ahead to the next marker, so the games after it still read.
+"""
+import argparse
+import importlib
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+MAGIC = b"GREC"
+VERSION = 2
+FILE_HEADER = struct.Struct("<4sB")
+RECORD_MARKER = b"\xffREC"
+RECORD_HEADER = struct.Struct("<BBBBQ")
+CRC = struct.Struct("<I")
+
+DEFAULT_PATH = "games.rec"
+
+# Game type code -> (module, class).
+GAME_TYPES = {
+    1: ("tic_tac_toe", "TicTacToe"),
+    2: ("connect_four", "ConnectFour"),
+    3: ("blackjack", "Blackjack"),
+    4: ("memory_game", "MemoryGame"),
+}
+TYPE_CODES = {class_name: code for code, (_, class_name) in GAME_TYPES.items()}
+
+UNFINISHED, FIRST_PLAYER, SECOND_PLAYER, DRAW = range(4)
+RESULTS = ("unfinished", "first player", "second player", "draw")
+
+_BYTES = tuple(bytes([i]) for i in range(128))
+
+
+def varint(value):
+    """Encodes a non-negative int, 7 bits per byte, low bits first."""
+    if value < 0x80:
+        return _BYTES[value]
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def read_varint(data, pos):
+    """Returns (value, position after it)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def game_params(game):
+    """Returns (type code, parameters) of a game instance."""
+    kind = type(game).__name__
+    if kind == "TicTacToe":
+        return TYPE_CODES[kind], (game.size, game.win_length, 0)
+    if kind == "ConnectFour":
+        return TYPE_CODES[kind], (game.rows, game.cols, game.win_length)
+    if kind == "MemoryGame":
+        return TYPE_CODES[kind], (game.rows, game.cols, 0)
+    return TYPE_CODES[kind], (0, 0, 0)
+
+
+def encode_move(game_type, params, entry):
+    """Move code of a history entry (what apply() put in game.history)."""
+    if game_type == TYPE_CODES["Blackjack"]:
+        return "hs".index(entry[0])
+    if game_type == TYPE_CODES["MemoryGame"]:
+        return entry[0] * params[0] * params[1] + entry[1]
+    return entry
+
+
+def decode_move(game_type, params, code):
+    """The apply() move of a move code."""
+    if game_type == TYPE_CODES["Blackjack"]:
+        return "hs"[code]
+    if game_type == TYPE_CODES["MemoryGame"]:
+        return divmod(code, params[0] * params[1])
+    return code
+
+
+def outcome(result):
+    """Maps a check_winner() result to one of the RESULTS codes."""
+    if result is None:
+        return UNFINISHED
+    if "Tie" in result:
+        return DRAW
+    if result == "X" or result.startswith(("You", "Player 1")):
+        return FIRST_PLAYER
+    return SECOND_PLAYER
+
+
+def _header(game, players):
+    game_type, params = game_params(game)
+    seed = getattr(game, "seed", 0)
+    out = bytearray(RECORD_MARKER + RECORD_HEADER.pack(game_type, *params, seed))
+    for name in players:
+        name = name.encode("utf-8")
+        out += varint(len(name))
+        out += name
+    return game_type, params, out
+
+
+def encode_game(game, players, result=None):
+    """The whole record of a finished game as bytes, built from its history."""
+    game_type, params, out = _header(game, players)
+    for entry in game.history:
+        out += varint(encode_move(game_type, params, entry) + 1)
+    out.append(0)
+    out.append(outcome(result))
+    out += CRC.pack(zlib.crc32(out))
+    return bytes(out)
+
+
+class RecordWriter:
+    """
+    Appends records to a file through a write buffer. Either stream a game
+    with begin(), played() after every move and end(), or write() a record
+    from encode_game().
+    """
+
+    def __init__(self, path=DEFAULT_PATH, buffer_size=1 << 16):
+        self.path = path
+        self.file = open(path, "ab", buffering=buffer_size)
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(path, "rb") as f:
+                header = f.read(FILE_HEADER.size)
+            if header != FILE_HEADER.pack(MAGIC, VERSION):
+                self.file.close()
+                raise ValueError(f"{path} is not a version {VERSION} game record file.")
+        self.game_type = None
+        self.params = None
+        # CRC-32 of the current record so far.
+        self.crc = 0
+
+    def begin(self, game, players=("Player 1", "Player 2")):
+        if self.game_type is not None:
+            self.end(None)
+        self.game_type, self.params, header = _header(game, players)
+        self.crc = zlib.crc32(header)
+        self.file.write(header)
+
+    def played(self, game):
+        """Records the move `game` has just applied (its last history entry)."""
+        move = varint(encode_move(self.game_type, self.params, game.history[-1]) + 1)
+        self.crc = zlib.crc32(move, self.crc)
+        self.file.write(move)
+
+    def end(self, result):
+        """Ends the current game with its check_winner() result, and flushes."""
+        tail = bytes((0, outcome(result)))
+        self.file.write(tail + CRC.pack(zlib.crc32(tail, self.crc)))
+        self.file.flush()
+        self.game_type = self.params = None
+
+    def write(self, record):
+        self.file.write(record)
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.game_type is not None:
+            self.end(None)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord:
+    """One recorded game. `moves` are move codes; see decode_move()."""
+    __slots__ = ("game_type", "params", "seed", "players", "moves", "result")
+
+    def __init__(self, game_type, params, seed, players, moves, result):
+        self.game_type = game_type
+        self.params = params
+        self.seed = seed
+        self.players = players
+        self.moves = moves
+        self.result = result
+
+    @property
+    def kind(self):
+        return GAME_TYPES[self.game_type][1]
+
+    def new_game(self):
+        """The game as it was before the first move."""
+        module_name, class_name = GAME_TYPES[self.game_type]
+        cls = getattr(importlib.import_module(module_name), class_name)
+        a, b, c = self.params
+        if class_name == "TicTacToe":
+            return cls(a, b)
+        if class_name == "ConnectFour":
+            return cls(a, b, c)
+        return cls(seed=self.seed)
+
+    def replay(self):
+        """
+        Yields the game after every move. It is the same game object each
+        time, updated in place; clone() it to keep a position.
+        """
+        game = self.new_game()
+        game_type, params = self.game_type, self.params
+        apply = game.apply
+        if game_type in (TYPE_CODES["TicTacToe"], TYPE_CODES["ConnectFour"]):
+            for move in self.moves:
+                apply(move)
+                yield game
+        else:
+            for code in self.moves:
+                apply(decode_move(game_type, params, code))
+                yield game
+
+    def boards(self):
+        """
+        Yields the board cells after every move of a Tic Tac Toe or Connect
+        Four game, laid out like the game's `cells` (1 first player, 2 second
+        player). Builds no game objects, so it walks an archive many times
+        faster than replay(). It is the same bytearray each time, updated in
+        place.
+        """
+        a, b, _ = self.params
+        piece = 1
+        if self.game_type == TYPE_CODES["TicTacToe"]:
+            cells = bytearray(a * a)
+            for move in self.moves:
+                cells[move] = piece
+                piece ^= 3
+                yield cells
+        elif self.game_type == TYPE_CODES["ConnectFour"]:
+            rows, cols = a, b
+            cells = bytearray(rows * cols)
+            # Next free cell of every column; row 0 is the top.
+            free = [(rows - 1) * cols + col for col in range(cols)]
+            for col in self.moves:
+                cells[free[col]] = piece
+                free[col] -= cols
+                piece ^= 3
+                yield cells
+        else:
+            raise ValueError(f"boards() needs a board game record, not {self.kind}; use replay().")
+
+    def final_position(self):
+        game = self.new_game()
+        game_type, params = self.game_type, self.params
+        if game_type in (TYPE_CODES["TicTacToe"], TYPE_CODES["ConnectFour"]):
+            for move in self.moves:
+                game.apply(move)
+        else:
+            for code in self.moves:
+                game.apply(decode_move(game_type, params, code))
+        return game
+
+
+def read_records(path=DEFAULT_PATH):
+    """
+    Yields the complete records of a record file in order. The file is
+    memory-mapped, so only the part being read is loaded.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < FILE_HEADER.size:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version = FILE_HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game record file.")
+        yield from _parse(data, FILE_HEADER.size)
+    finally:
+        data.close()
+
+
+def _parse(data, pos):
+    size = len(data)
+    while True:
+        start = data.find(RECORD_MARKER, pos)
+        if start < 0:
+            return
+        record, pos = _record(data, start, size)
+        if record is None:
+            # Cut short or damaged: go on from the next marker after it.
+            pos = start + 1
+            continue
+        yield record
+
+
+def _record(data, start, size):
+    # Returns (record, position after it), or (None, None) for a bad record.
+    pos = start + len(RECORD_MARKER)
+    if pos + RECORD_HEADER.size > size:
+        return None, None
+    game_type, a, b, c, seed = RECORD_HEADER.unpack_from(data, pos)
+    if game_type not in GAME_TYPES:
+        return None, None
+    pos += RECORD_HEADER.size
+
+    # 0 only ever appears as the end marker: every byte of a varint of
+    # code + 1 is non-zero.
+    players_start = pos
+    end = -1
+    try:
+        for _ in range(2):
+            length, pos = read_varint(data, pos)
+            pos += length
+        end = data.find(b"\0", pos)
+    except IndexError:
+        pass
+    if end < 0 or end + 2 + CRC.size > size:
+        return None, None
+    if zlib.crc32(data[start:end + 2]) != CRC.unpack_from(data, end + 2)[0]:
+        return None, None
+
+    players = []
+    pos = players_start
+    for _ in range(2):
+        length, pos = read_varint(data, pos)
+        players.append(data[pos:pos + length].decode("utf-8", "replace"))
+        pos += length
+    encoded = data[pos:end]
+    if not encoded or max(encoded) < 0x80:
+        # One byte per move, as nearly always.
+        moves = [byte - 1 for byte in encoded]
+    else:
+        moves = []
+        i = 0
+        while i < len(encoded):
+            code, i = read_varint(encoded, i)
+            moves.append(code - 1)
+    result = data[end + 1]
+    record = GameRecord(game_type, (a, b, c), seed, tuple(players), moves, result)
+    return record, end + 2 + CRC.size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize and replay a game record file.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--list", type=int, default=0, metavar="N", help="print the first N records")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"Error: {args.path} does not exist.")
+        return 1
+
+    start = time.perf_counter()
+    records = list(read_records(args.path))
+    read_time = time.perf_counter() - start
+    moves = sum(len(record.moves) for record in records)
+
+    for record in records[:args.list]:
+        print(f"{record.kind:<12} {' vs '.join(record.players):<36} {len(record.moves):>4} moves  "
+              f"{RESULTS[record.result]}")
+
+    for record in records[:1]:
+        record.new_game()  # imports the game module outside the timing
+    start = time.perf_counter()
+    for record in records:
+        record.final_position()
+    replay_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    board_moves = 0
+    for record in records:
+        if record.kind in ("TicTacToe", "ConnectFour"):
+            board_moves += len(record.moves)
+            for _ in record.boards():
+                pass
+    boards_time = time.perf_counter() - start
+
+    kinds = {}
+    for record in records:
+        kinds[record.kind] = kinds.get(record.kind, 0) + 1
+    print(f"{len(records):,} games ({', '.join(f'{n:,} {kind}' for kind, n in sorted(kinds.items()))}), "
+          f"{moves:,} moves, {os.path.getsize(args.path) / max(moves, 1):.2f} bytes per move")
+    print(f"read {moves / read_time if read_time else 0:,.0f} moves/s, "
+          f"replayed {moves / replay_time if replay_time else 0:,.0f} moves/s")
+    if board_moves:
+        print(f"boards only (Tic Tac Toe, Connect Four): {board_moves / boards_time if boards_time else 0:,.0f} moves/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
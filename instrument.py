@@ -0,0 +1,185 @@
+"""
+Optional instrumentation: call counts and timings of the game and bot
+methods, a few counters (bot moves, search nodes) and a per-move cProfile
+hook.
+
+Switched on by environment variables, or by main.py's --metrics and
+--profile-moves flags:
+
+    GAME_CENTER_METRICS=1               print a summary when the program exits
+    GAME_CENTER_METRICS=metrics.prom    write Prometheus text format on exit
+    GAME_CENTER_METRICS=metrics.jsonl   write a JSON-lines log on exit
+    GAME_CENTER_PROFILE=profiles        dump a cProfile file for every bot move
+
+Classes opt in with @measured("method", ...), and functions with @profiled.
+Both take effect when the class or function is defined. With instrumentation
+off they return it untouched, so the hot paths run exactly the code they
+would without this module. That means the settings must be in place before
+the game modules are imported; main.py imports those lazily, after parsing
+its flags.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+METRICS_ENV = "GAME_CENTER_METRICS"
+PROFILE_ENV = "GAME_CENTER_PROFILE"
+PREFIX = "game_center"
+
+metrics_target = os.environ.get(METRICS_ENV) or None
+profile_dir = os.environ.get(PROFILE_ENV) or None
+enabled = metrics_target is not None
+
+# "Class.method" -> [calls, total seconds, slowest call in seconds]
+timers = {}
+# Counter name -> total.
+counters = {}
+# Structured records (dicts), e.g. one per bot move, for the JSON-lines log.
+events = []
+
+_profiles = 0
+_exit_registered = False
+
+
+def configure(metrics=None, profile=None):
+    """
+    Turns instrumentation on from code (main.py's flags), as if the
+    environment variables had been set. `metrics` is "1" for a summary or a
+    file path.
+    """
+    global metrics_target, profile_dir, enabled
+    if metrics:
+        metrics_target = metrics
+        enabled = True
+    if profile:
+        profile_dir = profile
+    _register_exit()
+
+
+def measured(*methods):
+    """Class decorator that times each named method, when instrumentation is on."""
+    def decorate(cls):
+        if enabled:
+            for name in methods:
+                setattr(cls, name, _timed(f"{cls.__name__}.{name}", getattr(cls, name)))
+        return cls
+    return decorate
+
+
+def profiled(func):
+    """Dumps a cProfile file for every call of `func`, when a profile directory is set."""
+    if not profile_dir:
+        return func
+
+    import cProfile
+    os.makedirs(profile_dir, exist_ok=True)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _profiles
+        _profiles += 1
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            profile.dump_stats(os.path.join(profile_dir, f"{func.__qualname__}-{_profiles:04d}.prof"))
+    return wrapper
+
+
+def count(name, value=1):
+    counters[name] = counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    """Records a duration under `name`, like a call of a measured method."""
+    timer = timers.setdefault(name, [0, 0.0, 0.0])
+    timer[0] += 1
+    timer[1] += seconds
+    if seconds > timer[2]:
+        timer[2] = seconds
+
+
+def event(kind, **fields):
+    events.append({"event": kind, "time": time.time(), **fields})
+
+
+def _timed(name, func):
+    timers.setdefault(name, [0, 0.0, 0.0])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(name, time.perf_counter() - start)
+    return wrapper
+
+
+def prometheus():
+    """Returns all metrics in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {PREFIX}_calls_total Calls of an instrumented method.",
+        f"# TYPE {PREFIX}_calls_total counter",
+    ]
+    lines += [f'{PREFIX}_calls_total{{method="{name}"}} {calls}' for name, (calls, _, _) in sorted(timers.items())]
+    lines += [
+        f"# HELP {PREFIX}_seconds_total Time spent in an instrumented method.",
+        f"# TYPE {PREFIX}_seconds_total counter",
+    ]
+    lines += [f'{PREFIX}_seconds_total{{method="{name}"}} {seconds:.6f}'
+              for name, (_, seconds, _) in sorted(timers.items())]
+    lines += [
+        f"# HELP {PREFIX}_seconds_max Slowest call of an instrumented method.",
+        f"# TYPE {PREFIX}_seconds_max gauge",
+    ]
+    lines += [f'{PREFIX}_seconds_max{{method="{name}"}} {slowest:.6f}'
+              for name, (_, _, slowest) in sorted(timers.items())]
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        lines.append(f"{PREFIX}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def json_lines():
+    """Returns one JSON record per timer and counter, followed by the recorded events."""
+    records = [{"metric": name, "calls": calls, "seconds": seconds, "max_seconds": slowest}
+               for name, (calls, seconds, slowest) in sorted(timers.items())]
+    records += [{"counter": name, "value": value} for name, value in sorted(counters.items())]
+    records += events
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def summary():
+    lines = [f"{'method':<32} {'calls':>10} {'total ms':>10} {'avg us':>10} {'max ms':>9}"]
+    for name, (calls, seconds, slowest) in sorted(timers.items(), key=lambda item: -item[1][1]):
+        if calls:
+            lines.append(f"{name:<32} {calls:>10,} {seconds * 1000:>10.1f} {seconds / calls * 1e6:>10.1f} "
+                         f"{slowest * 1000:>9.2f}")
+    for name, value in sorted(counters.items()):
+        lines.append(f"{name:<32} {value:>10,}")
+    return "\n".join(lines) + "\n"
+
+
+def write(target=None):
+    """Writes the metrics to `target` (default: the configured one), picking the format by extension."""
+    target = target or metrics_target
+    if target in (None, "1"):
+        sys.stdout.write(summary())
+        return
+    text = prometheus() if target.endswith((".prom", ".txt")) else json_lines()
+    with open(target, "w") as f:
+        f.write(text)
+
+
+def _register_exit():
+    global _exit_registered
+    if enabled and not _exit_registered:
+        atexit.register(write)
+        _exit_registered = True
+
+
+_register_exit()
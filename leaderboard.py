@@ -0,0 +1,60 @@
+from bisect import bisect_left, insort
+
+
+class LeaderboardIndex:
+    """
+    Players kept ordered by score (highest first, then by name) as their
+    scores change, so top-K, rank and page queries never sort.
+
+    The order is a sorted list of (-score, name): updates are a binary search
+    plus one list insert/delete, and queries are slices or binary searches.
+    """
+
+    def __init__(self):
+        self.order = []
+        self.scores = {}
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, player):
+        return player in self.scores
+
+    def build(self, scores):
+        """
+        Replaces the contents with {player: score} in one sort. Use it for bulk
+        loads; one insort per player would be quadratic.
+        """
+        self.scores.clear()
+        self.scores.update(scores)
+        self.order[:] = sorted((-score, player) for player, score in scores.items())
+
+    def set(self, player, score):
+        old = self.scores.get(player)
+        if old is not None:
+            del self.order[bisect_left(self.order, (-old, player))]
+        self.scores[player] = score
+        insort(self.order, (-score, player))
+
+    def add(self, player, amount=1):
+        self.set(player, self.scores.get(player, 0) + amount)
+
+    def top(self, k):
+        """Returns the best `k` players as (name, score) pairs."""
+        return [(name, -neg) for neg, name in self.order[:k]]
+
+    def page(self, number, size):
+        """Returns (position, name, score) for page `number` (1-based) of `size` players."""
+        start = (number - 1) * size
+        return [(start + i + 1, name, -neg) for i, (neg, name) in enumerate(self.order[start:start + size])]
+
+    def rank(self, player):
+        """
+        Returns the 1-based competition rank of `player` (players tied on score
+        share a rank), or None if the player has no score here.
+        """
+        score = self.scores.get(player)
+        if score is None:
+            return None
+        # (-score,) sorts before every (-score, name) entry with that score.
+        return bisect_left(self.order, (-score,)) + 1
@@ -0,0 +1,122 @@
+"""
+Load-test client for server.py.
+
+    python loadtest.py --sessions 200 --idle 2000 --game connect4 --bot easy
+
+Opens `--sessions` active connections that each play random legal moves
+against the server's bot for `--games` games, plus `--idle` connections that
+only start a game and then sit idle. Reports move round-trip latency
+percentiles (p50/p99/max) and overall move throughput.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+def _legal_moves(state):
+    if state["game"] == "blackjack":
+        return ["h", "s"]
+    board = state["board"]
+    if state["game"] == "memory":
+        hidden = [f"{x} {y}" for y, row in enumerate(board) for x, card in enumerate(row) if card == "?"]
+        return [f"{a} {b}" for i, a in enumerate(hidden) for b in hidden[i + 1:]]
+    if state["game"] in ("connect4", "connect5"):
+        return [str(col) for col in range(len(board[0])) if board[0][col] == " "]
+    return [f"{x} {y}" for y, row in enumerate(board) for x, cell in enumerate(row) if cell == " "]
+
+
+async def _request(reader, writer, payload):
+    writer.write(json.dumps(payload).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def _active_session(host, port, game, bot, games, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            reply = await _request(reader, writer, {"op": "new", "game": game, "bot": bot})
+            if not reply["ok"]:
+                raise RuntimeError(reply["error"])
+            state = reply["state"]
+            while not state["result"]:
+                move = rng.choice(_legal_moves(state))
+                start = time.perf_counter()
+                reply = await _request(reader, writer, {"op": "move", "move": move})
+                latencies.append(time.perf_counter() - start)
+                state = reply["state"]
+        writer.write(b'{"op": "quit"}\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def _idle_session(host, port, game, ready, done):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await _request(reader, writer, {"op": "new", "game": game})
+        ready.release()
+        await done.wait()
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run(host, port, sessions, idle, game, bot, games, seed):
+    done = asyncio.Event()
+    ready = asyncio.Semaphore(0)
+    idle_tasks = [asyncio.create_task(_idle_session(host, port, game, ready, done)) for _ in range(idle)]
+    for _ in range(idle):
+        await ready.acquire()
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _active_session(host, port, game, bot, games, latencies, random.Random(seed + i))
+        for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    await asyncio.gather(*idle_tasks)
+
+    latencies.sort()
+    return {
+        "moves": len(latencies),
+        "elapsed": elapsed,
+        "moves_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=100, help="concurrently playing sessions")
+    parser.add_argument("--idle", type=int, default=0, help="extra sessions that stay connected but idle")
+    parser.add_argument("--game", default="connect4")
+    parser.add_argument("--bot", default="easy")
+    parser.add_argument("--games", type=int, default=5, help="games per active session")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.sessions, args.idle, args.game,
+                             args.bot, args.games, args.seed))
+    print(f"{result['moves']:,} moves in {result['elapsed']:.2f}s ({result['moves_per_sec']:,.0f} moves/s) "
+          f"with {args.sessions} active and {args.idle} idle sessions")
+    print(f"Move latency: p50 {result['p50_ms']:.1f}ms | p99 {result['p99_ms']:.1f}ms | "
+          f"max {result['max_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
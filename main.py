@@ -1,3 +1,6 @@
+import argparse
+import importlib
+import os
 import sys
 import time
 from rich.console import Console
@@ -6,25 +9,56 @@ from rich.prompt import Prompt
 from rich.text import Text
 from rich.align import Align
 
+import instrument
 from base_game import BoardGame
-from tic_tac_toe import TicTacToe
-from connect_four import ConnectFour
-from blackjack import Blackjack
-from memory_game import MemoryGame
-from ai_player import AIPlayer
-from score_manager import ScoreManager
+from game_record import RecordWriter, outcome, FIRST_PLAYER, SECOND_PLAYER, DRAW
+from render import Screen
 
 console = Console(force_terminal=True)
-score_manager = ScoreManager()
 
+# Menu option -> (game name, module, class, constructor arguments). Game
+# modules, the AI and the score store are only imported once they are needed,
+# so the menu comes up quickly.
+GAMES = {
+    "1": ("TicTacToe", "tic_tac_toe", "TicTacToe", {}),
+    "2": ("ConnectFour", "connect_four", "ConnectFour", {}),
+    "3": ("Blackjack", "blackjack", "Blackjack", {}),
+    "4": ("MemoryGame", "memory_game", "MemoryGame", {}),
+    "5": ("Gomoku", "tic_tac_toe", "TicTacToe", {"size": 15, "win_length": 5}),
+    "6": ("ConnectFive", "connect_four", "ConnectFour", {"rows": 8, "cols": 8, "win_length": 5}),
+}
+BOT_GAMES = ("TicTacToe", "ConnectFour")
+# Two-player games, whose matches count towards the ratings.
+RATED_GAMES = BOT_GAMES + ("MemoryGame",)
 
-def run_game(game_instance: BoardGame):
+_score_manager = None
+
+
+def get_score_manager():
+    """Loads the scores on first use."""
+    global _score_manager
+    if _score_manager is None:
+        from score_manager import ScoreManager
+        _score_manager = ScoreManager()
+    return _score_manager
+
+
+def new_game(choice):
+    _, module_name, class_name, kwargs = GAMES[choice]
+    return getattr(importlib.import_module(module_name), class_name)(**kwargs)
+
+
+def run_game(game_instance: BoardGame, incremental=True, render_stats=False, game_name=None, ponder=False,
+             recorder=None):
     console.clear()
 
     ai_bot = None
     is_vs_bot = False
+    kind = game_instance.__class__.__name__
+    # Scores are kept per game name, so board variants get their own.
+    game_name = game_name or kind
 
-    if isinstance(game_instance, (TicTacToe, ConnectFour)):
+    if kind in BOT_GAMES:
         console.print(Panel("Select Game Mode", style="bold cyan"))
 
         mode = Prompt.ask("Choose mode ([1] Vs Friend / [2] Vs Bot)",
@@ -35,20 +69,42 @@ def run_game(game_instance: BoardGame):
 
         if mode == "2":
             is_vs_bot = True
-            diff = Prompt.ask("Select Difficulty ([1] Easy / [2] Hard)",
-                              choices=["1", "2"],
+            diff = Prompt.ask("Select Difficulty ([1] Easy / [2] Hard / [3] Monte Carlo)",
+                              choices=["1", "2", "3"],
                               default="1",
                               show_default=False,
                               show_choices=False)
 
-            difficulty = "easy" if diff == "1" else "hard"
+            difficulty = {"1": "easy", "2": "hard", "3": "mcts"}[diff]
+            from ai_player import AIPlayer
             ai_bot = AIPlayer(difficulty)
 
-    console.clear()
-    title = Text(f"Starting {game_instance.__class__.__name__}!", style="bold cyan")
-    console.print(Align.center(Panel(title, expand=False)))
+    if recorder:
+        if kind == "Blackjack":
+            players = ("Player", "Dealer")
+        else:
+            players = ("Player 1", f"Bot ({ai_bot.difficulty})" if is_vs_bot else "Player 2")
+        recorder.begin(game_instance, players)
 
-    game_instance.display_board(console)
+    title = Text(f"Starting {game_name}!", style="bold cyan")
+
+    # Only the rows that changed are redrawn after each move; see render.Screen.
+    screen = Screen(console, diff=incremental)
+    status = []  # dim lines shown under the board
+
+    def paint(target):
+        target.print(Align.center(Panel(title, expand=False)))
+        game_instance.display_board(target)
+        for line in status:
+            target.print(Align.center(line))
+
+    def redraw():
+        screen.draw(paint)
+
+    if kind == "MemoryGame":
+        game_instance.redraw = redraw
+
+    redraw()
 
     while True:
         is_player_one = (game_instance.turn == 1)
@@ -62,29 +118,52 @@ def run_game(game_instance: BoardGame):
 
         if is_vs_bot and not is_player_one:
             console.print(f"[{player_color}]Bot is thinking...[/]")
-            time.sleep(0.8)
             move = ai_bot.get_move(game_instance)
 
         else:
-            if isinstance(game_instance, TicTacToe):
+            if ponder and is_vs_bot:
+                # The bot thinks about its answers while the player thinks.
+                ai_bot.start_pondering(game_instance)
+
+            if kind == "TicTacToe":
                 prompt_text = f"[{player_color}]{player_name}[/], enter move (x y)"
-            elif isinstance(game_instance, ConnectFour):
-                prompt_text = f"[{player_color}]{player_name}[/], enter column (0-6)"
-            elif isinstance(game_instance, Blackjack):
+            elif kind == "ConnectFour":
+                prompt_text = f"[{player_color}]{player_name}[/], enter column (0-{game_instance.cols - 1})"
+            elif kind == "Blackjack":
                 prompt_text = f"Action? (h = Hit, s = Stand)"
-            elif isinstance(game_instance, MemoryGame):
+            elif kind == "MemoryGame":
                 prompt_text = f"[{player_color}]{player_name}[/], flip first card (x y)"
 
             move = Prompt.ask(prompt_text)
 
         if game_instance.make_move(move):
-            console.clear()
-            console.print(Align.center(Panel(title, expand=False)))
-            game_instance.display_board(console)
+            if recorder:
+                recorder.played(game_instance)
+            status.clear()
+            if is_vs_bot and not is_player_one and ai_bot.pondered_for is not None:
+                status.append(f"[dim]Bot answered at once: it worked out this reply while you were "
+                              f"thinking ({ai_bot.pondered_for:.1f}s of pondering)[/]")
+            elif is_vs_bot and not is_player_one and ai_bot.used_book:
+                status.append("[dim]Bot played from its opening book[/]")
+            elif is_vs_bot and not is_player_one and ai_bot.mcts:
+                stats = ai_bot.last_search
+                status.append(f"[dim]Bot played {stats['iterations']:,} random games "
+                              f"({stats['ips']:,.0f}/s, {stats['reused']:,} kept from earlier turns)[/]")
+            elif is_vs_bot and not is_player_one and ai_bot.last_search:
+                stats = ai_bot.last_search
+                status.append(f"[dim]Bot searched to depth {stats['depth']} "
+                              f"({stats['nodes']:,} nodes, {stats['nps']:,.0f} nodes/s, "
+                              f"{stats['table']['hit_rate']:.0%} cache hits)[/]")
+            redraw()
 
             result = game_instance.check_winner()
             if result:
+                if recorder:
+                    recorder.end(result)
                 result_str = str(result)
+                names = {1: None, 2: f"Bot ({ai_bot.difficulty})" if is_vs_bot else None}
+                # The side whose win is still to be saved, if any.
+                winner = None
 
                 if "Tie" in result_str:
                     style = "yellow"
@@ -97,71 +176,212 @@ def run_game(game_instance: BoardGame):
                     msg = f"Winner: {result_str}!"
                     console.print(Align.center(Panel(f"[bold {style}]{msg}[/]", border_style=style)))
 
-
-                    winner_name = ""
-
                     if is_vs_bot and not is_player_one:
-                        winner_name = f"Bot ({ai_bot.difficulty})"
-                        score_manager.add_win(winner_name)
-                        console.print(f"[bold red]The Bot won! Score recorded for {winner_name}.[/]")
+                        get_score_manager().add_win(names[2], game_name, ai_bot.difficulty)
+                        console.print(f"[bold red]The Bot won! Score recorded for {names[2]}.[/]")
 
                     else:
                         if is_vs_bot:
                             console.print("[bold gold1]Impressive! You beat the AI![/]")
-
-                        save = Prompt.ask("Save score?", choices=["y", "n"], default="y", show_choices=True)
-
-                        if save == "y":
-                            default_name = "Player 1" if is_player_one else "Player 2"
-                            winner_name = Prompt.ask("Enter winner's name", default=default_name)
-
-                            winner_name = winner_name.strip() or default_name
-
-                            score_manager.add_win(winner_name)
-                            console.print(f"[green]Score saved for [bold]{winner_name}[/]![/]")
+                        winner = 2 if outcome(result) == SECOND_PLAYER else 1
 
                 else:
                     style = "red"
                     msg = f"Winner: {result_str}!"
                     console.print(Align.center(Panel(f"[bold {style}]{msg}[/]", border_style=style)))
-                Prompt.ask("\nPress Enter to finish game...")
-                break
 
-            if not isinstance(game_instance, Blackjack):
-                game_instance.switch_turn()
+                save_result(game_name, result, names, winner, kind in RATED_GAMES,
+                            ai_bot.difficulty if ai_bot else None)
 
+                if render_stats:
+                    stats = screen.stats()
+                    console.print(f"[dim]Rendering ({'diff' if incremental else 'full'} redraw): "
+                                  f"{stats['frames']} frames, {stats['ms_per_frame']:.1f} ms/frame, "
+                                  f"{stats['bytes_per_frame']:,.0f} bytes/frame[/]")
+                Prompt.ask("\nPress Enter to finish game...")
+                break
+        else:
+            # The error message and the prompt echo have moved the cursor below
+            # the frame, so the next frame has to be drawn in full.
+            screen.invalidate()
+
+    if ai_bot:
+        ai_bot.close()
+
+
+def save_result(game_name, result, names, winner=None, rated=False, difficulty=None):
+    """
+    Asks once whether to save a finished game, then for the names not known
+    yet: the winner's, and both players' if the match is `rated`. The same
+    names go into the win of side `winner` (1 or 2, None for no win to save)
+    and the rated match. `names` maps 1 and 2 to a name or None.
+    """
+    if winner is None and not rated:
+        return
+    save = Prompt.ask("Save score?", choices=["y", "n"], default="y", show_choices=True)
+    if save != "y":
+        return
+
+    sides = [winner] if winner else []
+    if rated:
+        sides += [side for side in (1, 2) if side != winner]
+    for side in sides:
+        if not names[side]:
+            default_name = f"Player {side}"
+            prompt = "Enter winner's name" if side == winner else f"Enter Player {side}'s name"
+            names[side] = Prompt.ask(prompt, default=default_name).strip() or default_name
+
+    if winner:
+        get_score_manager().add_win(names[winner], game_name, difficulty)
+        console.print(f"[green]Score saved for [bold]{names[winner]}[/]![/]")
+    if rated:
+        score = {FIRST_PLAYER: 1.0, SECOND_PLAYER: 0.0, DRAW: 0.5}[outcome(result)]
+        get_score_manager().add_match(names[1], names[2], score, game_name, difficulty)
+
+
+def show_leaderboard(page_size=10):
+    score_manager = get_score_manager()
+    page = 1
+    game = None
+    by = "wins"
 
-def main():
     while True:
         console.clear()
-        title = Text("Python CLI Game Center", justify="center", style="bold cyan")
-        console.print(Panel(title, padding=(1, 5)))
-
-        console.print("[1] [bold blue1]Tic Tac Toe[/]")
-        console.print("[2] [bold yellow]Connect Four[/]")
-        console.print("[3] [bold green]Blackjack (21)[/]")
-        console.print("[4] [bold magenta]Memory Game[/]")
-        console.print("[5] [bold gold1]Leaderboard[/]")
-        console.print("[q] [bold red]Quit[/]")
-
-        choice = Prompt.ask("\nSelect option", choices=["1", "2", "3", "4", "5", "q"], default="1", show_default=False)
-
-        if choice == '1':
-            run_game(TicTacToe())
-        elif choice == '2':
-            run_game(ConnectFour())
-        elif choice == '3':
-            run_game(Blackjack())
-        elif choice == '4':
-            run_game(MemoryGame())
-        elif choice == '5':
-            console.clear()
-            score_manager.display_leaderboard(console)
-            Prompt.ask("\nPress [bold]Enter[/] to return to menu")
-        elif choice == 'q':
-            console.print("[bold red]Goodbye![/]")
+        score_manager.display_leaderboard(console, page=page, page_size=page_size, game=game, by=by)
+        pages = score_manager.page_count(page_size, game, by=by)
+
+        other = "rating" if by == "wins" else "wins"
+        action = Prompt.ask(f"\n[n] Next page / [p] Previous page / [g] Filter by game / [r] Sort by {other} / "
+                            "Press [bold]Enter[/] to return to menu",
+                            choices=["n", "p", "g", "r", ""], default="", show_default=False, show_choices=False)
+
+        if action == "n":
+            page = min(page + 1, pages)
+        elif action == "p":
+            page = max(page - 1, 1)
+        elif action == "g":
+            options = ["all"] + score_manager.games()
+            selected = Prompt.ask("Show game", choices=options, default="all")
+            game = None if selected == "all" else selected
+            page = 1
+        elif action == "r":
+            by = other
+            page = 1
+        else:
             break
 
 
+def profile_startup(limit=15):
+    """
+    Prints the import-time breakdown of starting the menu (from a fresh
+    `python -X importtime` run), then what each lazily loaded module adds
+    when it is first needed.
+    """
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=here, capture_output=True, text=True)
+
+    # Lines look like "import time:  self [us] | cumulative | package", with
+    # the imports a package pulls in listed before it and indented one level.
+    children = []
+    imports = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        ms = int(parts[1]) / 1000
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((ms, name.strip()))
+        elif depth == 0:
+            if name == "main":
+                imports, total = children, ms
+            children = []
+
+    imports.sort(reverse=True)
+    console.print(f"[bold]Imports before the menu: {total:.1f} ms[/]", highlight=False)
+    for ms, name in imports[:limit]:
+        console.print(f"  {name:<24} {ms:8.1f} ms", highlight=False)
+
+    console.print("[bold]Loaded on demand:[/]")
+    modules = []
+    for _, module_name, _, _ in GAMES.values():
+        if module_name not in modules:
+            modules.append(module_name)
+    for module_name in modules + ["ai_player", "score_manager"]:
+        start = time.perf_counter()
+        importlib.import_module(module_name)
+        console.print(f"  {module_name:<24} {(time.perf_counter() - start) * 1000:8.1f} ms", highlight=False)
+
+    start = time.perf_counter()
+    get_score_manager()
+    console.print(f"  {'scores (load)':<24} {(time.perf_counter() - start) * 1000:8.1f} ms", highlight=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Python CLI Game Center")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="clear and reprint the whole screen after every move")
+    parser.add_argument("--render-stats", action="store_true",
+                        help="show frame time and bytes written per frame at the end of each game")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long startup imports take, then exit")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let the bot think about its replies during your turn")
+    parser.add_argument("--odds", action="store_true",
+                        help="show the exact odds of hitting and standing in Blackjack")
+    parser.add_argument("--record", metavar="FILE", help="append every game to this game record file")
+    parser.add_argument("--metrics", nargs="?", const="1", metavar="FILE",
+                        help="count and time game and bot calls; print a summary on exit, or write it to "
+                             "FILE (.prom for Prometheus text format, otherwise JSON lines)")
+    parser.add_argument("--profile-moves", metavar="DIR",
+                        help="write a cProfile file for every bot move to DIR")
+    args = parser.parse_args(argv)
+    incremental = not args.full_redraw
+    # Before any game module is imported, so that their classes get instrumented.
+    instrument.configure(args.metrics, args.profile_moves)
+
+    if args.profile_startup:
+        profile_startup()
+        return
+
+    recorder = RecordWriter(args.record) if args.record else None
+    try:
+        while True:
+            console.clear()
+            title = Text("Python CLI Game Center", justify="center", style="bold cyan")
+            console.print(Panel(title, padding=(1, 5)))
+
+            console.print("[1] [bold blue1]Tic Tac Toe[/]")
+            console.print("[2] [bold yellow]Connect Four[/]")
+            console.print("[3] [bold green]Blackjack (21)[/]")
+            console.print("[4] [bold magenta]Memory Game[/]")
+            console.print("[5] [bold cyan]Gomoku (15x15, five in a row)[/]")
+            console.print("[6] [bold orange1]Connect Five (8x8)[/]")
+            console.print("[7] [bold gold1]Leaderboard[/]")
+            console.print("[q] [bold red]Quit[/]")
+
+            choice = Prompt.ask("\nSelect option", choices=["1", "2", "3", "4", "5", "6", "7", "q"], default="1",
+                                show_default=False)
+
+            if choice in GAMES:
+                game = new_game(choice)
+                if args.odds and GAMES[choice][2] == "Blackjack":
+                    game.show_odds = True
+                run_game(game, incremental, args.render_stats, GAMES[choice][0], args.ponder, recorder)
+            elif choice == '7':
+                show_leaderboard()
+            elif choice == 'q':
+                console.print("[bold red]Goodbye![/]")
+                break
+    finally:
+        if recorder:
+            recorder.close()
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
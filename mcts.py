@@ -0,0 +1,260 @@
+"""
+Monte Carlo tree search (UCT) for the two-player board games.
+
+Only the generic BoardGame state API is used (legal_moves, apply, undo,
+clone, hash, check_winner and turn), so the same search plays Tic Tac Toe,
+Connect Four and their larger variants. A game counts as won by whoever made
+its last move, which holds for every game where players alternate turns.
+
+Each iteration walks down the tree picking children by UCB1, expands one
+untried move, and then plays `batch` random games (rollouts) from the new
+node before backing the results up. The tree is kept between calls, so once
+the opponent has replied, the subtree under the actual position is searched
+further instead of being rebuilt.
+
+With workers > 1 the search is root-parallel: every process of a pool grows
+its own tree of the position (and keeps it between turns too), and the root
+visit counts of all trees are added up to pick the move.
+"""
+import math
+import os
+import random
+import time
+
+
+class Node:
+    """A position in the tree, reached by `player` playing `move`."""
+    __slots__ = ("move", "parent", "player", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, player, untried):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        # Legal moves not expanded yet, in random order so pop() picks at random.
+        self.untried = untried
+        self.visits = 0
+        # Rollouts won by `player`, a draw counting as half.
+        self.wins = 0.0
+
+
+class MCTS:
+    """
+    UCT search with a time budget (seconds) and/or an iteration budget
+    (rollouts). best_move() plays the most visited root move; stats()
+    reports how much work it did.
+    """
+
+    def __init__(self, time_budget=1.0, iteration_budget=None, batch=8, workers=1, exploration=1.4,
+                 seed=None):
+        if time_budget is None and iteration_budget is None:
+            raise ValueError("MCTS needs a time budget or an iteration budget.")
+        self.time_budget = time_budget
+        self.iteration_budget = iteration_budget
+        self.batch = batch
+        self.workers = workers
+        self.exploration = exploration
+        # Seeded from the global RNG by default, so random.seed() makes runs repeatable.
+        self.rng = random.Random(random.getrandbits(64) if seed is None else seed)
+
+        # Optional threading.Event; setting it ends the search early.
+        self.stop = None
+
+        self.root = None
+        self.root_type = None
+        self.root_key = None
+        self.root_history = None
+        self.pool = None
+
+        self.iterations = 0
+        self.reused = 0
+        self.elapsed = 0.0
+
+    def best_move(self, game):
+        start = time.perf_counter()
+        if self.workers > 1:
+            visits = self._search_parallel(game, time.time() + self.time_budget if self.time_budget else None)
+        else:
+            deadline = start + self.time_budget if self.time_budget else None
+            self.iterations = self.search(game, self.iteration_budget, deadline)
+            visits = {child.move: child.visits for child in self.root.children}
+        self.elapsed = time.perf_counter() - start
+        if not visits:
+            return None
+        return max(visits, key=visits.get)
+
+    def stats(self):
+        return {
+            "iterations": self.iterations,
+            "reused": self.reused,
+            "workers": self.workers,
+            "elapsed": self.elapsed,
+            "ips": self.iterations / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
+    def close(self):
+        if self.pool:
+            self.pool.terminate()
+            self.pool = None
+
+    def search(self, game, iterations=None, deadline=None):
+        """
+        Grows the tree of `game`'s position until `iterations` rollouts have
+        been played or `deadline` (a perf_counter() time) has passed, and
+        returns the number of rollouts played.
+        """
+        root = self._find_root(game)
+        board = game.clone()
+        rng = self.rng
+        batch = self.batch
+        done = 0
+
+        stop = self.stop
+        while ((iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline)
+               and not (stop and stop.is_set())):
+            node = root
+            depth = 0
+            while not node.untried and node.children:
+                node = self._select(node)
+                board.apply(node.move)
+                depth += 1
+
+            if node.untried:
+                move = node.untried.pop()
+                player = board.turn
+                board.apply(move)
+                depth += 1
+                node = self._new_node(move, node, player, board)
+
+            # The turn value of the winner of each rollout, None for a draw.
+            results = [self._rollout(board, node.player, rng) for _ in range(batch)]
+            done += batch
+
+            for _ in range(depth):
+                board.undo()
+
+            while node is not None:
+                node.visits += batch
+                node.wins += sum(1.0 if winner == node.player else 0.5 if winner is None else 0.0
+                                 for winner in results)
+                node = node.parent
+
+        return done
+
+    def _new_node(self, move, parent, player, board):
+        untried = board.legal_moves()
+        self.rng.shuffle(untried)
+        node = Node(move, parent, player, untried)
+        if parent is not None:
+            parent.children.append(node)
+        return node
+
+    def _select(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        return max(node.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def _rollout(self, board, player, rng):
+        # Plays random moves to the end of the game and takes them back.
+        played = 0
+        moves = board.legal_moves()
+        while moves:
+            player = board.turn
+            board.apply(moves[rng.randrange(len(moves))])
+            played += 1
+            moves = board.legal_moves()
+
+        winner = None if board.check_winner() == "Tie" else player
+        for _ in range(played):
+            board.undo()
+        return winner
+
+    def _find_root(self, game):
+        """
+        Returns the tree node of `game`'s position: a node of the previous
+        tree if the game has moved on from its root along searched moves,
+        otherwise a new root.
+        """
+        node = None
+        history = game.history
+        if self.root is not None and type(game) is self.root_type and len(history) >= len(self.root_history):
+            played = history[len(self.root_history):]
+            # Same game as last time if taking back the new moves gives the old root.
+            probe = game.clone()
+            for _ in played:
+                probe.undo()
+            if probe.hash() == self.root_key:
+                node = self.root
+                for move in played:
+                    node = next((child for child in node.children if child.move == move), None)
+                    if node is None:
+                        break
+
+        if node is None:
+            node = self._new_node(None, None, None, game)
+        else:
+            node.parent = None
+        # Rollouts carried over from earlier searches.
+        self.reused = node.visits
+
+        self.root = node
+        self.root_type = type(game)
+        self.root_key = game.hash()
+        self.root_history = list(history)
+        return node
+
+    def _search_parallel(self, game, deadline):
+        # `deadline` is a time.time() (the workers' perf_counter() clocks are
+        # their own), the same for every task, so that a worker that takes
+        # two tasks still stops on time.
+        if self.pool is None:
+            from multiprocessing import Pool
+            self.pool = Pool(self.workers, _init_worker, (self.batch, self.exploration))
+
+        iterations = None
+        if self.iteration_budget is not None:
+            iterations = -(-self.iteration_budget // self.workers)
+        search_id = self.rng.getrandbits(64)
+        tasks = [(game, iterations, deadline, self.rng.getrandbits(64), search_id) for _ in range(self.workers)]
+
+        # A worker that happened to take two tasks reports its tree twice;
+        # only its last report counts, and it covers both tasks.
+        trees = {}
+        for pid, done, reused, visits in self.pool.imap_unordered(_worker_search, tasks):
+            trees[pid] = (done, reused, visits)
+
+        self.iterations = sum(done for done, _, _ in trees.values())
+        self.reused = sum(reused for _, reused, _ in trees.values())
+        totals = {}
+        for _, _, visits in trees.values():
+            for move, count in visits.items():
+                totals[move] = totals.get(move, 0) + count
+        return totals
+
+
+_worker = None
+# The search the worker's latest task belongs to, and its rollouts and reused rollouts so far.
+_search = (None, 0, 0)
+
+
+def _init_worker(batch, exploration):
+    global _worker
+    # Budgets come with every task.
+    _worker = MCTS(None, 0, batch, 1, exploration)
+
+
+def _worker_search(task):
+    global _search
+    game, iterations, deadline, seed, search_id = task
+    _worker.rng.seed(seed)
+    if deadline is not None:
+        deadline = time.perf_counter() + deadline - time.time()
+    done = _worker.search(game, iterations, deadline)
+
+    current, total, reused = _search
+    if current != search_id:
+        # The first task of this search: what the tree kept from earlier turns.
+        total, reused = 0, _worker.reused
+    _search = (search_id, total + done, reused)
+    return os.getpid(), total + done, reused, {child.move: child.visits for child in _worker.root.children}
@@ -4,33 +4,45 @@ from rich.table import Table
 from rich.align import Align
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.text import Text
 from rich import box
-from base_game import BoardGame
+import instrument
+from base_game import BoardGame, BoardView
 
+_console = Console()
 
+CARD_SYMBOLS = ('🐶', '🐸', '🐻', '🐷', '🐼', '🐧', '🐔', '🐯')
+
+# Renderables reused on every redraw.
+CARD_TEXT = tuple(Text(symbol) for symbol in CARD_SYMBOLS)
+HIDDEN_TEXT = Text("❔")
+
+
+@instrument.measured("check_winner", "make_move", "display_board")
 class MemoryGame(BoardGame):
-    def __init__(self):
+    __slots__ = ("rows", "cols", "scores", "cards", "revealed", "redraw", "seed")
+
+    def __init__(self, seed=None):
         self.rows = 4
         self.cols = 4
         self.turn = 1
+        self.moves_count = 0
+        self.history = []
         self.scores = {1: 0, 2: 0}
 
-        self.bonus_turn = False
-
-        symbols = ['🐶', '🐶', '🐸', '🐸', '🐻', '🐻', '🐷', '🐷',
-                   '🐼', '🐼', '🐧', '🐧', '🐔', '🐔', '🐯', '🐯']
-        random.shuffle(symbols)
+        # Flat, row * cols + col: cards[i] indexes CARD_SYMBOLS, revealed[i] is 1 once face up.
+        self.cards = bytearray(i // 2 for i in range(self.rows * self.cols))
+        # The layout comes from this seed, so a game can be replayed exactly.
+        self.seed = random.getrandbits(63) if seed is None else seed
+        random.Random(self.seed).shuffle(self.cards)
+        self.revealed = bytearray(self.rows * self.cols)
 
-        self.board = []
-        idx = 0
-        for r in range(self.rows):
-            row_data = []
-            for c in range(self.cols):
-                row_data.append(symbols[idx])
-                idx += 1
-            self.board.append(row_data)
+        # Called to show the cards as they flip; None prints the board below.
+        self.redraw = None
 
-        self.revealed = [[False for _ in range(self.cols)] for _ in range(self.rows)]
+    @property
+    def board(self):
+        return BoardView(self.cards, self.cols, CARD_SYMBOLS)
 
     def display_board(self, console):
         console.print(Align.center("[dim]Dont scroll up! Focus on the current board 👇[/]"))
@@ -44,11 +56,11 @@ class MemoryGame(BoardGame):
 
         for r in range(self.rows):
             row_display = []
-            for c in range(self.cols):
-                if self.revealed[r][c]:
-                    row_display.append(f"{self.board[r][c]}")
+            for i in range(r * self.cols, (r + 1) * self.cols):
+                if self.revealed[i]:
+                    row_display.append(CARD_TEXT[self.cards[i]])
                 else:
-                    row_display.append("❔")
+                    row_display.append(HIDDEN_TEXT)
 
             table.add_row(str(r), *row_display)
 
@@ -58,74 +70,78 @@ class MemoryGame(BoardGame):
         console.print(Align.center(f"[bold]{score_text}[/]"))
 
     def make_move(self, move):
-        temp_console = Console()
+        """
+        Takes the first card as "x y" and prompts for the second, showing the
+        cards as they flip. "x1 y1 x2 y2" picks both cards at once without
+        prompting or pausing.
+        """
         try:
             parts = move.split()
 
-            if len(parts) == 2:
-                c1, r1 = map(int, parts)
+            if len(parts) not in (2, 4):
+                print("Error: Please enter coordinates for the first card (x y)")
+                return False
 
-                if not (0 <= r1 < self.rows and 0 <= c1 < self.cols):
-                    print("Error: Out of bounds.")
-                    return False
+            c1, r1 = map(int, parts[:2])
+            if not self._is_valid_pick(r1, c1):
+                return False
 
-                if self.revealed[r1][c1]:
-                    print("Error: Card already revealed.")
+            if len(parts) == 4:
+                c2, r2 = map(int, parts[2:])
+                if not self._is_valid_pick(r2, c2):
                     return False
+                if r1 == r2 and c1 == c2:
+                    print("Error: Select different cards.")
+                    return False
+                self.apply((r1 * self.cols + c1, r2 * self.cols + c2))
+                return True
 
-                self.revealed[r1][c1] = True
+            first = r1 * self.cols + c1
+            self.revealed[first] = 1
 
-                print("\n")
-                self.display_board(temp_console)
+            self._show()
 
-                while True:
-                    player_color = "green" if self.turn == 1 else "magenta"
-                    second_input = Prompt.ask(f"[{player_color}]Player {self.turn}[/], flip second card (x y)")
+            while True:
+                player_color = "green" if self.turn == 1 else "magenta"
+                second_input = Prompt.ask(f"[{player_color}]Player {self.turn}[/], flip second card (x y)")
 
-                    parts2 = second_input.split()
+                parts2 = second_input.split()
 
-                    if len(parts2) != 2:
-                        print("Error: Invalid input. Try again.")
-                        continue
+                if len(parts2) != 2:
+                    print("Error: Invalid input. Try again.")
+                    continue
 
-                    try:
-                        c2, r2 = map(int, parts2)
-                    except ValueError:
-                        print("Error: Use numbers only.")
-                        continue
+                try:
+                    c2, r2 = map(int, parts2)
+                except ValueError:
+                    print("Error: Use numbers only.")
+                    continue
 
-                    if not (0 <= r2 < self.rows and 0 <= c2 < self.cols):
-                        print("Error: Out of bounds.")
-                        continue
+                if not self._is_valid_pick(r2, c2):
+                    continue
 
-                    if self.revealed[r2][c2]:
-                        print("Error: Card already revealed.")
-                        continue
+                if r1 == r2 and c1 == c2:
+                    print("Error: Select different cards.")
+                    continue
+                break
 
-                    if r1 == r2 and c1 == c2:
-                        print("Error: Select different cards.")
-                        continue
-                    break
-            else:
-                print("Error: Please enter coordinates for the first card (x y)")
-                return False
+            second = r2 * self.cols + c2
+            self.revealed[second] = 1
 
-            self.revealed[r2][c2] = True
+            self._show()
 
-            print("\n")
-            self.display_board(temp_console)
+            # apply() decides what stays face up.
+            self.revealed[first] = 0
+            self.revealed[second] = 0
+            matched = self.cards[first] == self.cards[second]
+            self.apply((first, second))
 
-            if self.board[r1][c1] == self.board[r2][c2]:
+            if matched:
                 print("It's a match! You get another turn!")
-                self.scores[self.turn] += 1
-                self.bonus_turn = True
                 time.sleep(1)
             else:
                 print("No match...")
-                self.bonus_turn = False
                 time.sleep(2)
-                self.revealed[r1][c1] = False
-                self.revealed[r2][c2] = False
 
             return True
 
@@ -133,24 +149,76 @@ class MemoryGame(BoardGame):
             print("Error: Invalid input. Use numbers.")
             return False
 
+    def legal_moves(self):
+        """Moves are (first, second) pairs of hidden card indexes, row * cols + col."""
+        hidden = [i for i in range(self.rows * self.cols) if not self.revealed[i]]
+        return [(a, b) for i, a in enumerate(hidden) for b in hidden[i + 1:]]
+
+    def apply(self, move):
+        first, second = move
+
+        # A match scores and keeps the turn; a miss flips both cards back over.
+        matched = self.cards[first] == self.cards[second]
+        if matched:
+            self.revealed[first] = 1
+            self.revealed[second] = 1
+            self.scores[self.turn] += 1
+        else:
+            self.switch_turn()
+
+        self.history.append((first, second, matched))
+        self.moves_count += 1
+
+    def undo(self):
+        first, second, matched = self.history.pop()
+        if matched:
+            self.revealed[first] = 0
+            self.revealed[second] = 0
+            self.scores[self.turn] -= 1
+        else:
+            self.switch_turn()
+        self.moves_count -= 1
+
+    def clone(self):
+        game = MemoryGame.__new__(MemoryGame)
+        game.rows = self.rows
+        game.cols = self.cols
+        game.turn = self.turn
+        game.moves_count = self.moves_count
+        game.history = list(self.history)
+        game.scores = dict(self.scores)
+        game.cards = self.cards  # never changes after the shuffle
+        game.seed = self.seed
+        game.revealed = bytearray(self.revealed)
+        game.redraw = None
+        return game
+
+    def hash(self):
+        # The state packed into bits (64 of them for a 4x4 board), so the key
+        # is the same in every process, unlike hash() of bytes.
+        cells = len(self.revealed)
+        width = (cells // 2).bit_length()
+        key = sum(1 << i for i, up in enumerate(self.revealed) if up)
+        return key | self.turn << cells | self.scores[1] << (cells + 2) | self.scores[2] << (cells + 2 + width)
+
+    def _show(self):
+        if self.redraw:
+            self.redraw()
+        else:
+            print("\n")
+            self.display_board(_console)
+
     def _is_valid_pick(self, r, c):
         if not (0 <= r < self.rows and 0 <= c < self.cols):
             print("Error: Out of bounds.")
             return False
-        if self.revealed[r][c]:
+        if self.revealed[r * self.cols + c]:
             print("Error: Card already revealed.")
             return False
         return True
 
     def check_winner(self):
-        all_revealed = True
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if not self.revealed[r][c]:
-                    all_revealed = False
-                    break
-
-        if all_revealed:
+        if all(self.revealed):
             if self.scores[1] > self.scores[2]:
                 return f"Player 1 Wins! ({self.scores[1]}-{self.scores[2]})"
             elif self.scores[2] > self.scores[1]:
@@ -160,8 +228,4 @@ class MemoryGame(BoardGame):
         return None
 
     def switch_turn(self):
-        if self.bonus_turn:
-            self.bonus_turn = False
-            return
-
-        self.turn = 1 if self.turn == 2 else 2
\ No newline at end of file
+        self.turn = 1 if self.turn == 2 else 2
@@ -0,0 +1,243 @@
+"""
+Connect Four opening book.
+
+    python -m opening_book --ply 8 --node-budget 20000 --workers 8
+
+The book is built offline. The builder deep-searches every position the hard
+bot can reach in its first `--ply` plies, whether it moves first or second and
+whatever the opponent plays. It writes the best move of each position to a
+sorted binary file:
+
+    header   magic b"C4BK", version, rows, cols, ply, entry count, Zobrist seed
+    entries  (key: uint64, move: uint8, result: int8), sorted by key
+
+`key` is the position's Zobrist key, or its mirror image's if that is smaller,
+so mirrored positions share one entry. `result` is 1 if the search found a
+forced win for the side to move, -1 for a forced loss and 0 otherwise.
+
+At runtime the file is memory-mapped and binary-searched in place. Opening
+the book reads nothing but the header, and lookups only touch the few pages
+the search visits.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+from connect_four import ConnectFour
+from search import MATE_THRESHOLD
+from transposition import ZOBRIST_SEED
+
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBQQ")
+ENTRY = struct.Struct("<QBb")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c4_book.bin")
+
+
+def book_key(game):
+    """
+    Returns (key, mirrored) for `game`: the smaller of its Zobrist key and the
+    key of its mirror image, and whether the mirror image's key was taken.
+    """
+    height = game.height
+    last = game.cols - 1
+    mirror = 0
+    for player in (0, 1):
+        mask = game.masks[player]
+        table = game.zobrist[player]
+        while mask:
+            low = mask & -mask
+            col, row = divmod(low.bit_length() - 1, height)
+            mirror ^= table[(last - col) * height + row]
+            mask ^= low
+    if mirror < game.key:
+        return mirror, True
+    return game.key, False
+
+
+class OpeningBook:
+    """A book file, memory-mapped read-only and searched in place."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.rows, self.cols, self.ply, self.count, seed = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book.")
+        if seed != ZOBRIST_SEED:
+            raise ValueError(f"{path} was built with different Zobrist keys.")
+        if HEADER.size + self.count * ENTRY.size > len(self.data):
+            raise ValueError(f"{path} is truncated.")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def probe(self, key):
+        """Returns (move, result) stored under `key`, or None."""
+        data = self.data
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_key, move, result = ENTRY.unpack_from(data, HEADER.size + mid * ENTRY.size)
+            if entry_key < key:
+                lo = mid + 1
+            elif entry_key > key:
+                hi = mid
+            else:
+                return move, result
+        return None
+
+    def lookup(self, game):
+        """Returns the book move for the side to move in `game`, or None if the position isn't in the book."""
+        if (game.rows != self.rows or game.cols != self.cols or game.win_length != 4
+                or game.moves_count >= self.ply):
+            return None
+
+        key, mirrored = book_key(game)
+        entry = self.probe(key)
+        if entry is None:
+            return None
+
+        move = entry[0]
+        if mirrored:
+            move = game.cols - 1 - move
+        return move if game.can_drop(move) else None
+
+
+_books = {}
+
+
+def get_book(path=DEFAULT_PATH):
+    """Returns the shared OpeningBook for `path`, or None if there is no usable book there."""
+    if path not in _books:
+        try:
+            _books[path] = OpeningBook(path)
+        except (OSError, ValueError):
+            _books[path] = None
+    return _books[path]
+
+
+def _search_position(task):
+    history, node_budget, time_budget = task
+    from ai_player import AIPlayer
+
+    game = ConnectFour()
+    for col in history:
+        game.apply(col)
+
+    bot = AIPlayer("hard", time_budget, node_budget)
+    bot_symbol = "X" if game.turn == 1 else "O"
+    opp_symbol = "O" if bot_symbol == "X" else "X"
+    move = bot.search.best_move(game, bot_symbol, opp_symbol)
+
+    score = bot.search.score
+    if score >= MATE_THRESHOLD:
+        result = 1
+    elif score <= -MATE_THRESHOLD:
+        result = -1
+    else:
+        result = 0
+    return history, move, result
+
+
+def build(ply=8, node_budget=20000, time_budget=None, workers=1, progress=None):
+    """
+    Searches every position the bot can face in its first `ply` plies, as
+    either player, and returns {key: (move, result)} with moves in the key's
+    frame (mirrored back when the key is the mirror image's).
+    """
+    entries = {}
+    # Positions with the bot to move, as move histories: the empty board (the
+    # bot moves first) and every first move of an opponent who moves first.
+    level = [[]] + [[col] for col in range(ConnectFour().cols)]
+
+    searched = 0
+    pool = None
+    if workers > 1:
+        from multiprocessing import Pool
+        pool = Pool(workers)
+    try:
+        while level:
+            tasks = []
+            for history in level:
+                game = ConnectFour()
+                for col in history:
+                    game.apply(col)
+                if game.moves_count >= ply or game.is_terminal():
+                    continue
+                key, _ = book_key(game)
+                if key in entries:
+                    continue
+                entries[key] = None  # claimed, so transpositions are searched once
+                tasks.append((history, node_budget, time_budget))
+
+            if pool:
+                results = pool.imap_unordered(_search_position, tasks)
+            else:
+                results = map(_search_position, tasks)
+
+            level = []
+            for history, move, result in results:
+                searched += 1
+                game = ConnectFour()
+                for col in history:
+                    game.apply(col)
+                key, mirrored = book_key(game)
+                entries[key] = (game.cols - 1 - move if mirrored else move, result)
+
+                # Every reply the opponent can make to the book move.
+                game.apply(move)
+                if not game.is_terminal():
+                    for reply in game.legal_moves():
+                        level.append(history + [move, reply])
+                if progress:
+                    progress(searched)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return entries
+
+
+def write(path, entries, ply, rows=6, cols=7):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, ply, len(entries), ZOBRIST_SEED))
+        for key in sorted(entries):
+            move, result = entries[key]
+            f.write(ENTRY.pack(key, move, result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Connect Four opening book.")
+    parser.add_argument("--ply", type=int, default=8, help="book covers positions with fewer moves than this")
+    parser.add_argument("--node-budget", type=int, default=20000, help="search nodes per position")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="search seconds per position (makes the book timing-dependent)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def progress(count):
+        sys.stdout.write(f"\r{count:,} positions searched ({time.perf_counter() - start:.0f}s)")
+        sys.stdout.flush()
+
+    entries = build(args.ply, args.node_budget, args.time_budget, args.workers, progress)
+    write(args.output, entries, args.ply)
+    size = HEADER.size + len(entries) * ENTRY.size
+    sys.stdout.write(f"\rWrote {len(entries):,} positions ({size:,} bytes) to {args.output} "
+                     f"in {time.perf_counter() - start:.0f}s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Player ratings (Glicko-2 or Elo) from the match history.
+
+    python -m ratings --system elo --k 24       # re-rate the stored matches
+    python -m ratings --synthetic 1000000       # time a batch re-rating
+
+As in Glicko-2, games are grouped into rating periods (a day by default), and
+every game in a period is rated against the opponent's rating at the start
+of that period. Ratings.add_match() is O(1): each player keeps running sums of
+their games in the current period, and their rating is worked out from
+those sums and their rating at the start of the period. A player only moves
+on to a new period when they next play, so nobody else is touched.
+
+recompute() rates a whole history from scratch, e.g. after changing K or tau,
+one period at a time: every period is a handful of NumPy operations over all
+of its games, whatever their number. It gives the same ratings as adding the
+matches one by one. Without NumPy it does just that. NumPy is only imported
+by recompute(), so rating game by game never loads it.
+
+Ratings are kept in a LeaderboardIndex as they change, so a leaderboard by
+rating never sorts.
+"""
+import argparse
+import math
+import random
+import time
+
+from leaderboard import LeaderboardIndex
+
+PERIOD = 24 * 60 * 60  # seconds
+INITIAL_RATING = 1500.0
+
+# Glicko-2 works on a scale of (rating - 1500) / 173.7178.
+GLICKO_SCALE = 400 / math.log(10)
+CONVERGENCE = 1e-6
+
+# Set by _import_numpy(), if NumPy is installed.
+np = None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+class PlayerRating:
+    """
+    A player's rating at the start of their latest period (`mu`, `phi`,
+    `sigma`, on the rating system's own scale), their games in that period
+    summed up (`v_sum`, `d_sum`) and the rating those give (`end`).
+    """
+    __slots__ = ("mu", "phi", "sigma", "period", "games", "v_sum", "d_sum", "end")
+
+    def __init__(self, mu, phi, sigma, period):
+        self.mu = mu
+        self.phi = phi
+        self.sigma = sigma
+        self.period = period
+        self.games = 0
+        self.v_sum = 0.0
+        self.d_sum = 0.0
+        self.end = (mu, phi, sigma)
+
+    def state(self):
+        """Everything from_state() needs: (mu, phi, sigma, period, games, v_sum, d_sum, *end)."""
+        return (self.mu, self.phi, self.sigma, self.period, self.games, self.v_sum, self.d_sum) + tuple(self.end)
+
+    @classmethod
+    def from_state(cls, state):
+        mu, phi, sigma, period, games, v_sum, d_sum, *end = state
+        player = cls(mu, phi, sigma, period)
+        player.games = games
+        player.v_sum = v_sum
+        player.d_sum = d_sum
+        player.end = tuple(end)
+        return player
+
+
+class Elo:
+    """Elo with K-factor `k`. Only `mu` (the rating itself) is used."""
+    name = "elo"
+
+    def __init__(self, k=32.0, initial=INITIAL_RATING):
+        self.k = k
+        self.initial = initial
+
+    def new_player(self, period):
+        return PlayerRating(self.initial, 0.0, 0.0, period)
+
+    def add_game(self, player, opponent, score):
+        expected = 1 / (1 + 10 ** ((opponent.mu - player.mu) / 400))
+        player.d_sum += score - expected
+        player.end = (player.mu + self.k * player.d_sum, 0.0, 0.0)
+
+    def idle(self, player, periods):
+        pass
+
+    def rating(self, player):
+        return player.end[0]
+
+    def deviation(self, player):
+        return 0.0
+
+    def rate_period(self, mu, phi, sigma, players, opponents, scores):
+        """
+        Vectorized add_game() for all of a period's games: `players`,
+        `opponents` and `scores` list every game from both sides, in order.
+        Returns the sums and the ratings at the end of the period, by player.
+        """
+        expected = 1 / (1 + 10 ** ((mu[opponents] - mu[players]) / 400))
+        d_sum = np.zeros(len(mu))
+        np.add.at(d_sum, players, scores - expected)
+        return np.zeros(len(mu)), d_sum, (mu + self.k * d_sum, phi, sigma)
+
+
+class Glicko2:
+    """
+    Glicko-2 (Glickman, "Example of the Glicko-2 system"). `tau` limits how
+    fast a player's volatility can change.
+    """
+    name = "glicko2"
+
+    def __init__(self, tau=0.5, initial=INITIAL_RATING, deviation=350.0, volatility=0.06):
+        self.tau = tau
+        self.initial = initial
+        self.initial_phi = deviation / GLICKO_SCALE
+        self.initial_sigma = volatility
+
+    def new_player(self, period):
+        return PlayerRating((self.initial - INITIAL_RATING) / GLICKO_SCALE, self.initial_phi,
+                            self.initial_sigma, period)
+
+    def add_game(self, player, opponent, score):
+        g = 1 / math.sqrt(1 + 3 * opponent.phi ** 2 / math.pi ** 2)
+        expected = 1 / (1 + math.exp(-g * (player.mu - opponent.mu)))
+        player.v_sum += g * g * expected * (1 - expected)
+        player.d_sum += g * (score - expected)
+
+        v = 1 / player.v_sum
+        sigma = self._volatility(player.phi, player.sigma, v, v * player.d_sum)
+        phi = 1 / math.sqrt(1 / (player.phi ** 2 + sigma ** 2) + 1 / v)
+        player.end = (player.mu + phi * phi * player.d_sum, phi, sigma)
+
+    def idle(self, player, periods):
+        # Sitting out a period only makes the rating less certain.
+        player.phi = math.sqrt(player.phi ** 2 + periods * player.sigma ** 2)
+
+    def rating(self, player):
+        return INITIAL_RATING + GLICKO_SCALE * player.end[0]
+
+    def deviation(self, player):
+        return GLICKO_SCALE * player.end[1]
+
+    def _volatility(self, phi, sigma, v, delta):
+        # Step 5: the new volatility, by the Illinois algorithm.
+        a = math.log(sigma * sigma)
+        tau = self.tau
+
+        def f(x):
+            ex = math.exp(x)
+            return (ex * (delta * delta - phi * phi - v - ex) / (2 * (phi * phi + v + ex) ** 2)
+                    - (x - a) / (tau * tau))
+
+        A = a
+        if delta * delta > phi * phi + v:
+            B = math.log(delta * delta - phi * phi - v)
+        else:
+            k = 1
+            while f(a - k * tau) < 0:
+                k += 1
+            B = a - k * tau
+        fA, fB = f(A), f(B)
+        while abs(B - A) > CONVERGENCE:
+            C = A + (A - B) * fA / (fB - fA)
+            fC = f(C)
+            if fC * fB <= 0:
+                A, fA = B, fB
+            else:
+                fA /= 2
+            B, fB = C, fC
+        return math.exp(A / 2)
+
+    def rate_period(self, mu, phi, sigma, players, opponents, scores):
+        """Vectorized add_game() for a whole period; see Elo.rate_period()."""
+        g = 1 / np.sqrt(1 + 3 * phi[opponents] ** 2 / math.pi ** 2)
+        expected = 1 / (1 + np.exp(-g * (mu[players] - mu[opponents])))
+        v_sum = np.zeros(len(mu))
+        d_sum = np.zeros(len(mu))
+        np.add.at(v_sum, players, g * g * expected * (1 - expected))
+        np.add.at(d_sum, players, g * (scores - expected))
+
+        played = np.unique(players)
+        end_mu, end_phi, end_sigma = mu.copy(), phi.copy(), sigma.copy()
+        v = 1 / v_sum[played]
+        new_sigma = self._volatilities(phi[played], sigma[played], v, v * d_sum[played])
+        new_phi = 1 / np.sqrt(1 / (phi[played] ** 2 + new_sigma ** 2) + 1 / v)
+        end_mu[played] = mu[played] + new_phi ** 2 * d_sum[played]
+        end_phi[played] = new_phi
+        end_sigma[played] = new_sigma
+        return v_sum, d_sum, (end_mu, end_phi, end_sigma)
+
+    def _volatilities(self, phi, sigma, v, delta):
+        # _volatility() for arrays: every player iterates until they converge.
+        a = np.log(sigma * sigma)
+        tau = self.tau
+        base = phi * phi + v
+
+        def f(x, a, delta, base):
+            ex = np.exp(x)
+            return ex * (delta * delta - base - ex) / (2 * (base + ex) ** 2) - (x - a) / (tau * tau)
+
+        A = a.copy()
+        B = np.empty_like(a)
+        wide = delta * delta > base
+        B[wide] = np.log(delta[wide] * delta[wide] - base[wide])
+        k = np.ones_like(a)
+        narrow = ~wide
+        while narrow.any():
+            low = f(a - k * tau, a, delta, base) < 0
+            k[narrow & low] += 1
+            narrow &= low
+        B[~wide] = (a - k * tau)[~wide]
+
+        fA, fB = f(A, a, delta, base), f(B, a, delta, base)
+        active = np.abs(B - A) > CONVERGENCE
+        while active.any():
+            i = np.flatnonzero(active)
+            C = A[i] + (A[i] - B[i]) * fA[i] / (fB[i] - fA[i])
+            fC = f(C, a[i], delta[i], base[i])
+            swap = fC * fB[i] <= 0
+            A[i] = np.where(swap, B[i], A[i])
+            fA[i] = np.where(swap, fB[i], fA[i] / 2)
+            B[i], fB[i] = C, fC
+            active[i] = np.abs(B[i] - A[i]) > CONVERGENCE
+        return np.exp(A / 2)
+
+
+SYSTEMS = {"elo": Elo, "glicko2": Glicko2}
+
+
+def signature(system=None, period=PERIOD):
+    """Names a rating system with its parameters and period, e.g. to tell whether saved ratings still hold."""
+    system = system or Glicko2()
+    params = ",".join(f"{key}={value!r}" for key, value in sorted(vars(system).items()))
+    return f"{system.name}({params}) period={float(period)!r}"
+
+
+class Ratings:
+    """Everyone's ratings under one rating system, kept up to date game by game."""
+
+    def __init__(self, system=None, period=PERIOD):
+        self.system = system or Glicko2()
+        self.period = period
+        self.players = {}
+        self.index = LeaderboardIndex()
+        # Players rated since this was last cleared, e.g. to save only those.
+        self.changed = set()
+
+    def __len__(self):
+        return len(self.players)
+
+    def add_match(self, player1, player2, score, ts=0.0):
+        """
+        Rates one game. `score` is player1's result: 1 for a win, 0.5 for a
+        draw and 0 for a loss.
+        """
+        period = int(ts // self.period)
+        first = self._player(player1, period)
+        second = self._player(player2, period)
+        # Both sides are rated against the other's start-of-period rating,
+        # which add_game() leaves alone.
+        self.system.add_game(first, second, score)
+        self.system.add_game(second, first, 1 - score)
+        first.games += 1
+        second.games += 1
+        self.index.set(player1, self.system.rating(first))
+        self.index.set(player2, self.system.rating(second))
+        self.changed.add(player1)
+        self.changed.add(player2)
+
+    def restore(self, states):
+        """Adds players saved as {name: PlayerRating.state()}."""
+        for name, state in states.items():
+            self.players[name] = PlayerRating.from_state(state)
+        self.index.build({name: self.system.rating(player) for name, player in self.players.items()})
+
+    def _player(self, name, period):
+        player = self.players.get(name)
+        if player is None:
+            player = self.players[name] = self.system.new_player(period)
+        elif period > player.period:
+            # The player's last period is over: its result is their new start.
+            idle = period - player.period - (1 if player.games else 0)
+            if player.games:
+                player.mu, player.phi, player.sigma = player.end
+            self.system.idle(player, idle)
+            player.period = period
+            player.games = 0
+            player.v_sum = player.d_sum = 0.0
+            player.end = (player.mu, player.phi, player.sigma)
+        return player
+
+    def rating(self, name):
+        player = self.players.get(name)
+        return self.system.rating(player) if player else None
+
+    def deviation(self, name):
+        player = self.players.get(name)
+        return self.system.deviation(player) if player else None
+
+
+def recompute(matches, system=None, period=PERIOD):
+    """
+    Rates `matches`, (player1, player2, score, ts) tuples in the order they
+    were played, from scratch. Returns a Ratings ready for more add_match()
+    calls.
+    """
+    ratings = Ratings(system, period)
+    if _import_numpy() is None:
+        for match in matches:
+            ratings.add_match(*match)
+        return ratings
+
+    matches = list(matches)
+    if not matches:
+        return ratings
+    system = ratings.system
+
+    ids = {}
+    first = np.array([ids.setdefault(m[0], len(ids)) for m in matches], dtype=np.int64)
+    second = np.array([ids.setdefault(m[1], len(ids)) for m in matches], dtype=np.int64)
+    scores = np.array([m[2] for m in matches], dtype=np.float64)
+    periods = np.array([m[3] for m in matches], dtype=np.float64) // period
+
+    count = len(ids)
+    template = system.new_player(0)
+    mu = np.full(count, template.mu)
+    phi = np.full(count, template.phi)
+    sigma = np.full(count, template.sigma)
+    # Each player's latest period, as PlayerRating keeps it: start, sums and end.
+    last = np.full(count, -1, dtype=np.int64)
+    start = (mu.copy(), phi.copy(), sigma.copy())
+    v_last = np.zeros(count)
+    d_last = np.zeros(count)
+    games = np.zeros(count, dtype=np.int64)
+
+    # Every game from both sides, in order, so sums add up as add_match() adds them.
+    players = np.empty(2 * len(matches), dtype=np.int64)
+    opponents = np.empty_like(players)
+    both_scores = np.empty(2 * len(matches))
+    players[0::2], players[1::2] = first, second
+    opponents[0::2], opponents[1::2] = second, first
+    both_scores[0::2], both_scores[1::2] = scores, 1 - scores
+
+    bounds = np.flatnonzero(np.diff(periods)) + 1
+    for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(matches)]))):
+        p = int(periods[lo])
+        who = players[2 * lo:2 * hi]
+        played = np.unique(who)
+
+        # Players back after sitting out periods; newcomers start fresh.
+        returning = played[last[played] >= 0]
+        if system.name == "glicko2" and len(returning):
+            idle = p - last[returning] - 1
+            phi[returning] = np.sqrt(phi[returning] ** 2 + idle * sigma[returning] ** 2)
+
+        v_sum, d_sum, (end_mu, end_phi, end_sigma) = system.rate_period(
+            mu, phi, sigma, who, opponents[2 * lo:2 * hi], both_scores[2 * lo:2 * hi])
+
+        for kept, now in zip(start, (mu, phi, sigma)):
+            kept[played] = now[played]
+        v_last[played] = v_sum[played]
+        d_last[played] = d_sum[played]
+        games[played] = np.bincount(who, minlength=count)[played]
+        last[played] = p
+        mu[played], phi[played], sigma[played] = end_mu[played], end_phi[played], end_sigma[played]
+
+    for name, i in ids.items():
+        player = PlayerRating(float(start[0][i]), float(start[1][i]), float(start[2][i]), int(last[i]))
+        player.games = int(games[i])
+        player.v_sum = float(v_last[i])
+        player.d_sum = float(d_last[i])
+        player.end = (float(mu[i]), float(phi[i]), float(sigma[i]))
+        ratings.players[name] = player
+    ratings.index.build({name: system.rating(player) for name, player in ratings.players.items()})
+    return ratings
+
+
+def synthetic_matches(count, players=1000, per_period=5000, seed=0):
+    """Random matches between players of hidden strengths, `per_period` games a period."""
+    rng = random.Random(seed)
+    strength = [rng.gauss(0, 1) for _ in range(players)]
+    matches = []
+    for i in range(count):
+        a, b = rng.sample(range(players), 2)
+        win = rng.random() < 1 / (1 + math.exp(strength[b] - strength[a]))
+        matches.append((f"player{a}", f"player{b}", 1.0 if win else 0.0, (i // per_period) * PERIOD))
+    return matches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute all ratings from the match history.")
+    parser.add_argument("--system", choices=sorted(SYSTEMS), default="glicko2")
+    parser.add_argument("--k", type=float, default=32.0, help="Elo K-factor")
+    parser.add_argument("--tau", type=float, default=0.5, help="Glicko-2 volatility constraint")
+    parser.add_argument("--period", type=float, default=PERIOD, help="rating period in seconds")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="rate N random matches instead of the stored ones, and compare with one by one")
+    args = parser.parse_args(argv)
+
+    system = Elo(args.k) if args.system == "elo" else Glicko2(args.tau)
+    if args.synthetic:
+        matches = synthetic_matches(args.synthetic)
+    else:
+        from score_store import ScoreStore
+        store = ScoreStore()
+        matches = [(p1, p2, score, ts) for p1, p2, score, _, _, ts in store.load_matches()]
+        store.close()
+
+    start = time.perf_counter()
+    ratings = recompute(matches, system, args.period)
+    elapsed = time.perf_counter() - start
+    print(f"Rated {len(matches):,} matches, {len(ratings):,} players, in {elapsed:.2f}s "
+          f"({len(matches) / elapsed if elapsed else 0:,.0f} matches/s)")
+
+    if args.synthetic:
+        start = time.perf_counter()
+        one_by_one = Ratings(system, args.period)
+        for match in matches:
+            one_by_one.add_match(*match)
+        elapsed = time.perf_counter() - start
+        drift = max(abs(ratings.rating(name) - one_by_one.rating(name)) for name in ratings.players)
+        print(f"One by one: {elapsed:.2f}s ({len(matches) / elapsed:,.0f} matches/s), "
+              f"largest difference {drift:.2e} rating points")
+
+    for rank, name, rating in ratings.index.page(1, args.top):
+        print(f"{rank:>4}. {name:<24} {rating:>7.0f} ± {ratings.deviation(name):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import time
+
+# ANSI control sequences: move the cursor to (row, 1), clear to the end of
+# the line / the screen, and clear the whole screen from the top left.
+MOVE_TO = "\x1b[{};1H"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+# Lines kept free under a frame for prompts and messages. A frame taller than
+# the terminal minus this margin could scroll, which breaks cursor addressing.
+PROMPT_MARGIN = 6
+
+
+class Screen:
+    """
+    Draws the game screen in place.
+
+    Every frame is rendered off-screen into lines first. The first frame
+    clears the terminal; after that only the lines that differ from the
+    previous frame are rewritten (by moving the cursor to them), and everything
+    below the frame, such as old prompts, is cleared. A move therefore repaints
+    a couple of board rows instead of the whole screen, without the flicker of
+    a clear. With diff=False every frame is a full clear and reprint, which is
+    what the game loop used to do.
+
+    frames, bytes_written and seconds add up what each frame cost.
+    """
+
+    def __init__(self, console, diff=True):
+        self.console = console
+        self.diff = diff
+        self.lines = None
+        self.frames = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    def draw(self, paint):
+        """Draws the frame that `paint(console)` prints."""
+        start = time.perf_counter()
+        with self.console.capture() as capture:
+            paint(self.console)
+        lines = capture.get().splitlines()
+
+        if (not self.diff or self.lines is None
+                or len(lines) > self.console.height - PROMPT_MARGIN):
+            output = CLEAR_SCREEN + "".join(line + "\n" for line in lines)
+        else:
+            changed = []
+            for row, line in enumerate(lines):
+                if row >= len(self.lines) or line != self.lines[row]:
+                    changed.append(MOVE_TO.format(row + 1) + line + CLEAR_LINE)
+            output = "".join(changed) + MOVE_TO.format(len(lines) + 1) + CLEAR_BELOW
+
+        self.console.file.write(output)
+        self.console.file.flush()
+        self.lines = lines
+
+        self.frames += 1
+        self.bytes_written += len(output.encode())
+        self.seconds += time.perf_counter() - start
+
+    def invalidate(self):
+        """Makes the next frame a full redraw, e.g. after something else wrote to the screen."""
+        self.lines = None
+
+    def stats(self):
+        frames = self.frames or 1
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes_written,
+            "bytes_per_frame": self.bytes_written / frames,
+            "ms_per_frame": self.seconds / frames * 1000,
+        }
@@ -1,54 +1,193 @@
-import json
-import os
+import sqlite3
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.align import Align
-
-SCORE_FILE = "scores.json"
+from score_store import ScoreStore
+from leaderboard import LeaderboardIndex
+from ratings import Ratings, recompute, signature, PERIOD
 
 
 class ScoreManager:
-    def __init__(self):
-        self.scores = self._load_scores()
+    def __init__(self, store=None, rating_system=None, rating_period=PERIOD):
+        self.store = store if store is not None else ScoreStore()
+        # (player, game, difficulty) -> wins; '' stands for "not recorded".
+        self.counts = {}
+        # One ordered index per (game, difficulty) filter, None meaning "any".
+        self.indexes = {(None, None): LeaderboardIndex()}
+        self.scores = self.indexes[(None, None)].scores
+
+        # Summed per filter first and indexed with one sort each.
+        totals = {}
+        for key, wins in self.store.load().items():
+            self.counts[key] = self.counts.get(key, 0) + wins
+            for filter_key in self._filters(key):
+                scores = totals.setdefault(filter_key, {})
+                scores[key[0]] = scores.get(key[0], 0) + wins
+        for filter_key, scores in totals.items():
+            self.indexes.setdefault(filter_key, LeaderboardIndex()).build(scores)
 
-    def _load_scores(self):
-        if not os.path.exists(SCORE_FILE):
-            return {}
+        # Game (None for all games) -> Ratings of everyone who played it.
+        self.ratings = {}
+        # What the ratings were rated as, and the last match id saved with them.
+        self.rated_as = None
+        self.ratings_saved_id = 0
+        self.rerate(rating_system, rating_period)
 
+    def add_win(self, player_name, game=None, difficulty=None):
         try:
-            with open(SCORE_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
+            self.store.record_win(player_name, game, difficulty)
+        except sqlite3.Error:
+            print("Error: Could not save scores.")
+            return
+        # Picks up this win along with any recorded by other sessions meanwhile.
+        self.refresh()
+
+    def add_match(self, player1, player2, score, game=None, difficulty=None):
+        """Records a finished game for the ratings; `score` is player1's (1 win, 0.5 draw, 0 loss)."""
+        try:
+            self.store.record_match(player1, player2, score, game, difficulty)
+        except sqlite3.Error:
+            print("Error: Could not save the match.")
+            return
+        self.refresh()
+
+    def refresh(self):
+        """Applies wins and matches logged since the last refresh, including other sessions'."""
+        for key in self.store.poll():
+            self._apply(key, 1)
+        self._rate_new()
+
+    def rerate(self, system=None, period=PERIOD):
+        """
+        Switches the ratings to another rating system or other parameters.
+        Ratings saved under them are loaded and brought up to date; otherwise
+        the whole match history is rated again in one batch pass.
+        """
+        rated_as = signature(system, period)
+        if rated_as == self.rated_as:
+            return
+        self.rating_system = system
+        self.rating_period = period
+        self.rated_as = rated_as
+
+        saved = self.store.load_ratings(rated_as)
+        if saved is not None:
+            states = {}
+            for game, player, *state in saved:
+                states.setdefault(game or None, {})[player] = state
+            self.ratings = {}
+            for game, players in states.items():
+                self.ratings[game] = Ratings(system, period)
+                self.ratings[game].restore(players)
+            self.ratings_saved_id = self.store.last_match_id
+            self._rate_new()
+            return
+
+        by_game = {None: []}
+        for player1, player2, score, game, _, ts in self.store.load_matches():
+            match = (player1, player2, score, ts)
+            by_game[None].append(match)
+            by_game.setdefault(game or None, []).append(match)
+        self.ratings = {game: recompute(matches, system, period) for game, matches in by_game.items()}
+        self._save_ratings(replace=True)
 
-    def add_win(self, player_name):
-        if player_name not in self.scores:
-            self.scores[player_name] = 0
+    def _rate_new(self):
+        matches = self.store.poll_matches()
+        for match in matches:
+            self._rate(match)
+        if matches:
+            self._save_ratings()
 
-        self.scores[player_name] += 1
-        self._save_scores()
+    def _rate(self, match):
+        player1, player2, score, game, _, ts = match
+        for key in {None, game or None}:
+            ratings = self.ratings.get(key)
+            if ratings is None:
+                ratings = self.ratings[key] = Ratings(self.rating_system, self.rating_period)
+            ratings.add_match(player1, player2, score, ts)
 
-    def _save_scores(self):
+    def _save_ratings(self, replace=False):
+        # Only the players rated since the last save, unless replacing it all.
+        rows = []
+        for game, ratings in self.ratings.items():
+            names = ratings.players if replace else ratings.changed
+            rows.extend((game or "", name) + ratings.players[name].state() for name in names)
         try:
-            with open(SCORE_FILE, "w") as f:
-                json.dump(self.scores, f, indent=4)
-        except IOError:
-            print("Error: Could not save scores.")
+            saved = self.store.save_ratings(self.rated_as, self.store.last_match_id, rows,
+                                            None if replace else self.ratings_saved_id)
+        except sqlite3.Error:
+            print("Error: Could not save the ratings.")
+            return
+        if saved:
+            for ratings in self.ratings.values():
+                ratings.changed.clear()
+            self.ratings_saved_id = self.store.last_match_id
+
+    @staticmethod
+    def _filters(key):
+        _, game, difficulty = key
+        game = game or None
+        difficulty = difficulty or None
+        return {(None, None), (game, None), (None, difficulty), (game, difficulty)}
+
+    def _apply(self, key, wins):
+        player = key[0]
+        self.counts[key] = self.counts.get(key, 0) + wins
+
+        for filter_key in self._filters(key):
+            index = self.indexes.get(filter_key)
+            if index is None:
+                index = self.indexes[filter_key] = LeaderboardIndex()
+            index.add(player, wins)
+
+    def _index(self, game=None, difficulty=None, by="wins"):
+        if by == "rating":
+            # Ratings are per game only.
+            ratings = self.ratings.get(game)
+            return ratings.index if ratings else LeaderboardIndex()
+        return self.indexes.get((game, difficulty)) or LeaderboardIndex()
+
+    def games(self):
+        """Names of the games that have recorded wins or matches."""
+        games = {game for game, difficulty in self.indexes if game and difficulty is None}
+        return sorted(games | {game for game in self.ratings if game})
+
+    def rating(self, player_name, game=None):
+        ratings = self.ratings.get(game)
+        return ratings.rating(player_name) if ratings else None
+
+    def top(self, k, game=None, difficulty=None):
+        return self._index(game, difficulty).top(k)
+
+    def rank(self, player_name, game=None, difficulty=None):
+        return self._index(game, difficulty).rank(player_name)
+
+    def page(self, number, size, game=None, difficulty=None):
+        return self._index(game, difficulty).page(number, size)
+
+    def page_count(self, size, game=None, difficulty=None, by="wins"):
+        return max(1, -(-len(self._index(game, difficulty, by)) // size))
 
-    def display_leaderboard(self, console):
-        if not self.scores:
+    def display_leaderboard(self, console, page=1, page_size=10, game=None, difficulty=None, by="wins"):
+        """Shows a page of the players ordered by wins, or with by="rating" by rating."""
+        self.refresh()
+        index = self._index(game, difficulty, by)
+        if not len(index):
             console.print(Panel("No scores recorded yet!", style="bold yellow"))
             return
 
-        sorted_scores = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        title = "🏆 Hall of Fame 🏆" if by == "wins" else "📈 Ratings 📈"
+        if game or difficulty:
+            title += f"\n{' / '.join(part for part in (game, difficulty) if part)}"
 
-        table = Table(title="🏆 Hall of Fame 🏆", style="bold magenta")
+        table = Table(title=title, style="bold magenta",
+                      caption=f"Page {page} of {self.page_count(page_size, game, difficulty, by)}")
         table.add_column("Rank", justify="center", style="cyan", no_wrap=True)
         table.add_column("Player Name", justify="center", style="green")
-        table.add_column("Wins", justify="center", style="bold yellow")
+        table.add_column("Wins" if by == "wins" else "Rating", justify="center", style="bold yellow")
 
-        for rank, (name, wins) in enumerate(sorted_scores, 1):
+        for rank, name, score in index.page(page, page_size):
             if rank == 1:
                 rank_display = "🥇"
             elif rank == 2:
@@ -58,6 +197,6 @@ class ScoreManager:
             else:
                 rank_display = str(rank)
 
-            table.add_row(rank_display, name, str(wins))
+            table.add_row(rank_display, name, str(score) if by == "wins" else f"{score:.0f}")
 
-        console.print(Align.center(table))
\ No newline at end of file
+        console.print(Align.center(table))
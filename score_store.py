@@ -0,0 +1,291 @@
+"""
+Append-only score storage on SQLite in WAL mode.
+
+Every win is appended to the `wins` event log with its game, difficulty and
+timestamp. The `totals` table is a snapshot of per-player counts covering the
+log up to `snapshot_id`; compaction folds the log tail into it. Loading reads
+the snapshot plus the (short) tail, so startup cost tracks the number of
+players, not the length of the history.
+
+The `matches` table logs every rated game: both players and the result. The
+`ratings` table saves every player's rating state as of `ratings_match_id`,
+rated as `ratings_signature` (the system and its parameters), so startup only
+rates the matches since. The match log is never compacted: re-rating with
+another system reads all of it.
+
+SQLite transactions make every write atomic and its file locks let several
+sessions share one database. Note that WAL mode needs the database on a local
+filesystem or a container volume, not a network share.
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+
+DB_FILE = "scores.db"
+LEGACY_SCORE_FILE = "scores.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player TEXT NOT NULL,
+    game TEXT NOT NULL DEFAULT '',
+    difficulty TEXT NOT NULL DEFAULT '',
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    player TEXT NOT NULL,
+    game TEXT NOT NULL DEFAULT '',
+    difficulty TEXT NOT NULL DEFAULT '',
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (player, game, difficulty)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player1 TEXT NOT NULL,
+    player2 TEXT NOT NULL,
+    score REAL NOT NULL,
+    game TEXT NOT NULL DEFAULT '',
+    difficulty TEXT NOT NULL DEFAULT '',
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    game TEXT NOT NULL DEFAULT '',
+    player TEXT NOT NULL,
+    mu REAL NOT NULL,
+    phi REAL NOT NULL,
+    sigma REAL NOT NULL,
+    period INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    v_sum REAL NOT NULL,
+    d_sum REAL NOT NULL,
+    end_mu REAL NOT NULL,
+    end_phi REAL NOT NULL,
+    end_sigma REAL NOT NULL,
+    PRIMARY KEY (game, player)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ScoreStore:
+    def __init__(self, path=DB_FILE, legacy_path=LEGACY_SCORE_FILE, compact_every=1000):
+        self.path = path
+        self.legacy_path = legacy_path
+        # Tail length past which load() compacts before reading.
+        self.compact_every = compact_every
+        self.last_seen_id = 0
+        self.last_match_id = 0
+
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate_legacy()
+
+    def close(self):
+        self.conn.close()
+
+    def load(self):
+        """
+        Returns {(player, game, difficulty): wins} built from the snapshot and
+        the log tail, and marks everything read as seen for poll().
+        """
+        if self._tail_length() > self.compact_every:
+            self.compact()
+
+        counts = {}
+        self.conn.execute("BEGIN")
+        try:
+            snapshot_id = self._get_meta("snapshot_id", 0)
+            for player, game, difficulty, wins in self.conn.execute(
+                    "SELECT player, game, difficulty, wins FROM totals"):
+                counts[(player, game, difficulty)] = wins
+
+            for player, game, difficulty, wins in self.conn.execute(
+                    "SELECT player, game, difficulty, COUNT(*) FROM wins WHERE id > ? "
+                    "GROUP BY player, game, difficulty", (snapshot_id,)):
+                key = (player, game, difficulty)
+                counts[key] = counts.get(key, 0) + wins
+
+            row = self.conn.execute("SELECT MAX(id) FROM wins").fetchone()
+            self.last_seen_id = max(snapshot_id, row[0] or 0)
+        finally:
+            self.conn.execute("COMMIT")
+        return counts
+
+    def record_win(self, player, game=None, difficulty=None):
+        """Appends a single win to the log. The insert is its own atomic transaction."""
+        cursor = self.conn.execute(
+            "INSERT INTO wins (player, game, difficulty, ts) VALUES (?, ?, ?, ?)",
+            (player, game or "", difficulty or "", time.time()))
+        return cursor.lastrowid
+
+    def poll(self):
+        """Returns (player, game, difficulty) for every win logged since the last load()/poll()."""
+        rows = self.conn.execute(
+            "SELECT id, player, game, difficulty FROM wins WHERE id > ? ORDER BY id",
+            (self.last_seen_id,)).fetchall()
+        if rows:
+            self.last_seen_id = rows[-1][0]
+        return [(player, game, difficulty) for _, player, game, difficulty in rows]
+
+    def record_match(self, player1, player2, score, game=None, difficulty=None):
+        """Appends a finished game; `score` is player1's result (1 win, 0.5 draw, 0 loss)."""
+        cursor = self.conn.execute(
+            "INSERT INTO matches (player1, player2, score, game, difficulty, ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (player1, player2, score, game or "", difficulty or "", time.time()))
+        return cursor.lastrowid
+
+    def load_matches(self):
+        """
+        Returns every match as (player1, player2, score, game, difficulty, ts),
+        oldest first, and marks them as seen for poll_matches().
+        """
+        rows = self.conn.execute(
+            "SELECT id, player1, player2, score, game, difficulty, ts FROM matches ORDER BY id").fetchall()
+        if rows:
+            self.last_match_id = rows[-1][0]
+        return [row[1:] for row in rows]
+
+    def poll_matches(self):
+        """Returns the matches logged since the last load_matches()/poll_matches()."""
+        rows = self.conn.execute(
+            "SELECT id, player1, player2, score, game, difficulty, ts FROM matches WHERE id > ? ORDER BY id",
+            (self.last_match_id,)).fetchall()
+        if rows:
+            self.last_match_id = rows[-1][0]
+        return [row[1:] for row in rows]
+
+    def load_ratings(self, signature):
+        """
+        Returns the saved rating state as (game, player, mu, phi, sigma, period,
+        games, v_sum, d_sum, end_mu, end_phi, end_sigma) rows, and marks the
+        matches it covers as seen for poll_matches(). Returns None if the
+        ratings were saved under another `signature`, or never.
+        """
+        self.conn.execute("BEGIN")
+        try:
+            if self._get_meta("ratings_signature", None, str) != signature:
+                return None
+            rows = self.conn.execute(
+                "SELECT game, player, mu, phi, sigma, period, games, v_sum, d_sum, end_mu, end_phi, end_sigma "
+                "FROM ratings").fetchall()
+            self.last_match_id = self._get_meta("ratings_match_id", 0)
+        finally:
+            self.conn.execute("COMMIT")
+        return rows
+
+    def save_ratings(self, signature, match_id, rows, since=None):
+        """
+        Saves rating state rows (as load_ratings() returns them) covering the
+        matches up to `match_id`. With since=None they replace the saved state.
+        Otherwise `rows` are the players rated by matches after `since`, and
+        they update a saved state of the same signature that is at least that
+        recent but not newer than `match_id`; another session saved anything
+        else, and the rows are dropped. Returns whether they were saved.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if since is None:
+                self.conn.execute("DELETE FROM ratings")
+            elif (self._get_meta("ratings_signature", None, str) != signature
+                  or not since <= self._get_meta("ratings_match_id", 0) <= match_id):
+                self.conn.execute("COMMIT")
+                return False
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO ratings (game, player, mu, phi, sigma, period, games, v_sum, d_sum, "
+                "end_mu, end_phi, end_sigma) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._set_meta("ratings_signature", signature)
+            self._set_meta("ratings_match_id", match_id)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def compact(self, prune=False):
+        """
+        Folds the log tail into the totals snapshot. With prune=True the folded
+        events are deleted as well; otherwise the full history is kept.
+        Returns the number of events folded.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            snapshot_id = self._get_meta("snapshot_id", 0)
+            row = self.conn.execute("SELECT MAX(id) FROM wins").fetchone()
+            last_id = row[0] or 0
+            if last_id <= snapshot_id:
+                self.conn.execute("COMMIT")
+                return 0
+
+            folded = self.conn.execute(
+                "SELECT COUNT(*) FROM wins WHERE id > ? AND id <= ?", (snapshot_id, last_id)).fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO totals (player, game, difficulty, wins) "
+                "SELECT player, game, difficulty, COUNT(*) FROM wins WHERE id > ? AND id <= ? "
+                "GROUP BY player, game, difficulty "
+                "ON CONFLICT (player, game, difficulty) DO UPDATE SET wins = wins + excluded.wins",
+                (snapshot_id, last_id))
+            self._set_meta("snapshot_id", last_id)
+            if prune:
+                self.conn.execute("DELETE FROM wins WHERE id <= ?", (last_id,))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return folded
+
+    def _tail_length(self):
+        snapshot_id = self._get_meta("snapshot_id", 0)
+        return self.conn.execute("SELECT COUNT(*) FROM wins WHERE id > ?", (snapshot_id,)).fetchone()[0]
+
+    def _migrate_legacy(self):
+        # One-time import of the old {"name": wins} scores.json into the snapshot.
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._get_meta("legacy_migrated", 0):
+                self.conn.execute("COMMIT")
+                return
+
+            try:
+                with open(self.legacy_path, "r") as f:
+                    legacy = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                legacy = {}
+
+            for player, wins in legacy.items():
+                self.conn.execute(
+                    "INSERT INTO totals (player, game, difficulty, wins) VALUES (?, '', '', ?) "
+                    "ON CONFLICT (player, game, difficulty) DO UPDATE SET wins = wins + excluded.wins",
+                    (player, int(wins)))
+            self._set_meta("legacy_migrated", 1)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _get_meta(self, key, default, cast=int):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return cast(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                          "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        print("Usage: python score_store.py compact [--prune]")
+        sys.exit(1)
+
+    store = ScoreStore()
+    folded = store.compact(prune="--prune" in sys.argv[2:])
+    print(f"Folded {folded} wins into the snapshot.")
@@ -0,0 +1,207 @@
+import time
+from transposition import EXACT, LOWER, UPPER, perspective_key
+
+WIN_SCORE = 1000000
+# Scores beyond this are forced wins/losses and depend on the distance to the end.
+MATE_THRESHOLD = WIN_SCORE - 1000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search once the time or node budget is used up."""
+
+
+class NegamaxSearch:
+    """
+    Iterative-deepening alpha-beta (negamax) search for the N-in-a-row games
+    (ConnectFour, and TicTacToe on boards of any size).
+
+    Moves come from game.search_moves(), which lists them in a good order
+    and may leave out hopeless ones. They are played and taken back in place
+    with apply()/undo(), and game.winner tells when a move won. The search keeps
+    deepening until the time or node budget runs out and then returns the best
+    move of the last completed depth.
+    """
+
+    def __init__(self, evaluate, time_budget=0.8, node_budget=None, table=None, root_bias=None):
+        # evaluate(game, bot_symbol, opp_symbol) scores a position for bot_symbol.
+        self.evaluate = evaluate
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        # Optional TranspositionTable, kept across calls by the owner.
+        self.table = table
+        # Optional root_bias(game, move), subtracted from each root move's score.
+        self.root_bias = root_bias
+        # Optional threading.Event; setting it ends the search early.
+        self.stop = None
+
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = 0
+        self.elapsed = 0.0
+        self._deadline = None
+        self._bot_symbol = None
+        self._opp_symbol = None
+        self._salt = 0
+
+    def best_move(self, game, bot_symbol, opp_symbol):
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = 0
+        start = time.perf_counter()
+        self._deadline = start + self.time_budget if self.time_budget else None
+        self._bot_symbol = bot_symbol
+        self._opp_symbol = opp_symbol
+        self._salt = perspective_key(bot_symbol)
+
+        order = game.search_moves()
+        best = order[0] if order else None
+        max_depth = len(game.cells) - game.moves_count
+
+        try:
+            for depth in range(1, max_depth + 1):
+                move, score = self._search_root(game, depth, order, bot_symbol, opp_symbol)
+                best = move
+                self.depth_reached = depth
+                self.score = score
+
+                # Principal move first on the next iteration.
+                order.remove(move)
+                order.insert(0, move)
+
+                if abs(score) >= MATE_THRESHOLD:
+                    break
+        except SearchTimeout:
+            pass
+
+        self.elapsed = time.perf_counter() - start
+        return best
+
+    def stats(self):
+        nps = self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+        stats = {
+            "depth": self.depth_reached,
+            "score": self.score,
+            "nodes": self.nodes,
+            "elapsed": self.elapsed,
+            "nps": nps,
+        }
+        if self.table is not None:
+            stats["table"] = self.table.stats()
+        return stats
+
+    def _search_root(self, game, depth, order, bot_symbol, opp_symbol):
+        alpha = -float('inf')
+        beta = float('inf')
+        best = None
+
+        for move in order:
+            # The child is searched against alpha shifted by the bias, so
+            # pruning stays exact.
+            bias = self.root_bias(game, move) if self.root_bias else 0
+
+            game.apply(move)
+            try:
+                score = self._child_score(game, depth, alpha + bias, beta, bot_symbol, opp_symbol, 1)
+            finally:
+                game.undo()
+
+            if abs(score) < MATE_THRESHOLD:
+                score -= bias
+
+            if best is None or score > alpha:
+                alpha = score
+                best = move
+
+        return best, alpha
+
+    def _child_score(self, game, depth, alpha, beta, mover, other, ply):
+        # Score, from the mover's side, of the position right after its move.
+        if game.winner:
+            return WIN_SCORE - ply
+        if game.moves_count == len(game.cells):
+            return 0
+        return -self._negamax(game, depth - 1, -beta, -alpha, other, mover, ply)
+
+    def _negamax(self, game, depth, alpha, beta, symbol, other, ply):
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            self._check_budget()
+
+        if depth == 0:
+            # The evaluation is always taken from the bot's side; negate it
+            # when the opponent is the one to move.
+            score = self.evaluate(game, self._bot_symbol, self._opp_symbol)
+            return score if symbol == self._bot_symbol else -score
+
+        moves = game.search_moves()
+        if self.table is not None:
+            key = game.key ^ self._salt
+            entry = self.table.lookup(key)
+            if entry is not None:
+                entry_depth, entry_score, flag, tt_move = entry
+                if entry_depth >= depth:
+                    score = self._score_from_table(entry_score, ply)
+                    if flag == EXACT:
+                        return score
+                    if flag == LOWER and score > alpha:
+                        alpha = score
+                    elif flag == UPPER and score < beta:
+                        beta = score
+                    if alpha >= beta:
+                        return score
+                if tt_move is not None and tt_move in moves:
+                    moves.remove(tt_move)
+                    moves.insert(0, tt_move)
+        alpha_orig = alpha
+
+        best = -float('inf')
+        best_move = None
+        for move in moves:
+            game.apply(move)
+            try:
+                score = self._child_score(game, depth, alpha, beta, symbol, other, ply + 1)
+            finally:
+                game.undo()
+
+            if score > best:
+                best = score
+                best_move = move
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+
+        if self.table is not None:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.table.store(key, depth, self._score_to_table(best, ply), flag, best_move)
+
+        return best
+
+    def _score_to_table(self, score, ply):
+        # Forced-win scores count plies from the root; store them relative
+        # to this node so the entry stays valid wherever it is reached from.
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    def _score_from_table(self, score, ply):
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
+
+    def _check_budget(self):
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+        if self.node_budget is not None and self.nodes >= self.node_budget:
+            raise SearchTimeout()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
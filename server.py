@@ -0,0 +1,230 @@
+"""
+Network game server.
+
+    python server.py --port 8765
+
+Hosts many concurrent game sessions over TCP with one asyncio event loop.
+Every connection is one session and speaks newline-delimited JSON:
+
+    {"op": "new", "game": "connect4", "bot": "hard"}   start a game (bot may be null)
+    {"op": "move", "move": "3"}                        same move text as the terminal UI
+                                                       (Memory takes both cards: "x1 y1 x2 y2")
+    {"op": "state"}                                    current state without moving
+    {"op": "quit"}                                     close the session
+
+Each request gets one JSON reply with "ok", the game state and, after a move
+against a bot, the bot's reply in "bot_move". Bot searches run in an executor
+so a slow search never blocks other sessions.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from blackjack import Blackjack, card_rank, card_suit
+from memory_game import MemoryGame
+from ai_player import AIPlayer
+
+GAMES = {
+    "tictactoe": TicTacToe,
+    "connect4": ConnectFour,
+    "gomoku": partial(TicTacToe, 15, 5),
+    "connect5": partial(ConnectFour, 8, 8, 5),
+    "blackjack": Blackjack,
+    "memory": MemoryGame,
+}
+BOT_GAMES = ("tictactoe", "connect4", "gomoku", "connect5")
+
+
+def _bot_move(difficulty, time_budget, game):
+    # Used with the process pool: the game is pickled over, so the bot is fresh.
+    return AIPlayer(difficulty, time_budget).get_move(game)
+
+
+class Session:
+    def __init__(self, game_name, game, bot=None):
+        self.game_name = game_name
+        self.game = game
+        self.bot = bot
+        self.result = None
+
+    def state(self):
+        game = self.game
+        state = {"game": self.game_name, "turn": game.turn, "result": self.result}
+
+        if isinstance(game, Blackjack):
+            def labels(hand):
+                return [card_rank(card) + card_suit(card) for card in hand]
+
+            dealer = labels(game.dealer_hand)
+            if not game.game_over:
+                dealer[0] = "?"
+            state["player"] = labels(game.player_hand)
+            state["player_score"] = game.player_hand.score
+            state["dealer"] = dealer
+            state["dealer_score"] = game.dealer_hand.score if game.game_over else None
+        elif isinstance(game, MemoryGame):
+            cols = game.cols
+            state["board"] = [[card if game.revealed[r * cols + c] else "?" for c, card in enumerate(row)]
+                              for r, row in enumerate(game.board)]
+            state["scores"] = game.scores
+        else:
+            state["board"] = game.board.tolist()
+        return state
+
+    def apply(self, move):
+        """Plays one move; returns an error message, or None if the move was made."""
+        if isinstance(self.game, MemoryGame):
+            error = self._memory_move(move)
+            if error:
+                return error
+            self.result = self.game.check_winner()
+            return None
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            valid = self.game.make_move(move)
+        if not valid:
+            return output.getvalue().strip() or "Invalid move."
+
+        self.result = self.game.check_winner()
+        return None
+
+    def _memory_move(self, move):
+        # make_move() would prompt for a second card on the server's own
+        # terminal and sleep while the cards show, so both cards come at once.
+        game = self.game
+        try:
+            c1, r1, c2, r2 = map(int, move.split())
+        except ValueError:
+            return "Memory moves take both cards: x1 y1 x2 y2"
+        if not all(0 <= c < game.cols and 0 <= r < game.rows for c, r in ((c1, r1), (c2, r2))):
+            return "Out of bounds."
+        first = r1 * game.cols + c1
+        second = r2 * game.cols + c2
+        if (min(first, second), max(first, second)) not in game.legal_moves():
+            return "Pick two different cards that are still face down."
+        game.apply((first, second))
+        return None
+
+
+class GameServer:
+    def __init__(self, bot_time=0.8, bot_workers=4, bot_processes=False):
+        self.bot_time = bot_time
+        self.bot_processes = bot_processes
+        if bot_processes:
+            self.executor = ProcessPoolExecutor(bot_workers)
+        else:
+            self.executor = ThreadPoolExecutor(bot_workers)
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        session = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                except (ValueError, AttributeError):
+                    await self._send(writer, {"ok": False, "error": "Requests must be JSON objects."})
+                    continue
+
+                if op == "quit":
+                    break
+                elif op == "new":
+                    session, reply = self._new_session(request)
+                elif session is None:
+                    reply = {"ok": False, "error": "Start a game first."}
+                elif op == "move":
+                    reply = await self._move(session, str(request.get("move", "")))
+                elif op == "state":
+                    reply = {"ok": True, "state": session.state()}
+                else:
+                    reply = {"ok": False, "error": f"Unknown op: {op}"}
+
+                await self._send(writer, reply)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def _new_session(self, request):
+        game_name = request.get("game")
+        if game_name not in GAMES:
+            return None, {"ok": False, "error": f"Unknown game. Choose from: {', '.join(GAMES)}"}
+
+        bot = None
+        difficulty = request.get("bot")
+        if difficulty:
+            if game_name not in BOT_GAMES:
+                return None, {"ok": False, "error": f"Bots only play {', '.join(BOT_GAMES)}."}
+            bot = AIPlayer(difficulty, self.bot_time)
+
+        session = Session(game_name, GAMES[game_name](), bot)
+        return session, {"ok": True, "state": session.state()}
+
+    async def _move(self, session, move):
+        if session.result:
+            return {"ok": False, "error": "The game is over.", "state": session.state()}
+
+        error = session.apply(move)
+        if error:
+            return {"ok": False, "error": error, "state": session.state()}
+
+        reply = {"ok": True}
+        # The bot always plays the second seat.
+        if session.bot and not session.result and session.game.turn != 1:
+            loop = asyncio.get_running_loop()
+            if self.bot_processes:
+                bot_move = await loop.run_in_executor(
+                    self.executor, _bot_move, session.bot.difficulty, self.bot_time, session.game)
+            else:
+                bot_move = await loop.run_in_executor(self.executor, session.bot.get_move, session.game)
+            session.apply(bot_move)
+            reply["bot_move"] = bot_move
+
+        reply["state"] = session.state()
+        return reply
+
+    async def _send(self, writer, reply):
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, bot_time=0.8, bot_workers=4, bot_processes=False):
+    game_server = GameServer(bot_time, bot_workers, bot_processes)
+    server = await asyncio.start_server(game_server.handle, host, port, backlog=4096)
+    print(f"Serving games on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host game sessions over TCP (newline-delimited JSON).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bot-time", type=float, default=0.8, help="search time per bot move, in seconds")
+    parser.add_argument("--bot-workers", type=int, default=4)
+    parser.add_argument("--bot-processes", action="store_true",
+                        help="run bot searches in worker processes instead of threads")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.bot_time, args.bot_workers, args.bot_processes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
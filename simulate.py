@@ -0,0 +1,182 @@
+"""
+Headless bot-vs-bot simulator.
+
+    python -m simulate connect4 --games 100000 --p1 hard --p2 easy --workers 8
+
+Games are split into chunks and spread over a process pool. Every chunk gets
+its own RNG seed derived from --seed, so a run is reproducible no matter how
+the chunks are scheduled across workers (as long as the bots use node budgets
+rather than time budgets).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+from tic_tac_toe import TicTacToe
+from connect_four import ConnectFour
+from ai_player import AIPlayer
+from transposition import SharedTranspositionTable
+from game_record import RecordWriter, encode_game
+
+GAMES = {
+    "tictactoe": TicTacToe,
+    "connect4": ConnectFour,
+    "gomoku": partial(TicTacToe, 15, 5),
+    "connect5": partial(ConnectFour, 8, 8, 5),
+}
+
+# check_winner() results mapped to 1 (first player), 2 (second player) or 0 (draw).
+OUTCOMES = {"X": 1, "Player 1": 1, "O": 2, "Player 2": 2, "Tie": 0}
+
+
+def play_game(game, p1, p2):
+    """Plays one game between two bots. Returns (outcome, number of moves)."""
+    while True:
+        bot = p1 if game.turn == 1 else p2
+        game.apply(bot.choose_move(game))
+
+        result = game.check_winner()
+        if result:
+            return OUTCOMES[result], game.moves_count
+
+
+# SharedTranspositionTable used by every bot of this process, if any.
+_table = None
+
+
+def _init_worker(table):
+    global _table
+    _table = table
+
+
+def run_chunk(task):
+    """Plays a chunk of games. Returns the totals and, if asked for, the encoded game records."""
+    game_name, p1_difficulty, p2_difficulty, games, seed, time_budget, node_budget, record = task
+    random.seed(seed)
+    game_cls = GAMES[game_name]
+    players = (f"Bot ({p1_difficulty})", f"Bot ({p2_difficulty})")
+
+    totals = [0, 0, 0, 0]  # draws, p1 wins, p2 wins, total moves
+    records = []
+    for _ in range(games):
+        p1 = AIPlayer(p1_difficulty, time_budget, node_budget, table=_table)
+        p2 = AIPlayer(p2_difficulty, time_budget, node_budget, table=_table)
+        game = game_cls()
+        outcome, moves = play_game(game, p1, p2)
+        totals[outcome] += 1
+        totals[3] += moves
+        if record:
+            records.append(encode_game(game, players, game.check_winner()))
+    return totals, b"".join(records)
+
+
+def simulate(game_name, games, p1, p2, workers=1, seed=0, time_budget=None, node_budget=1000,
+             chunk_size=None, progress=None, shared_table=None, record=None):
+    """
+    Plays `games` bot-vs-bot games and returns a dict of results.
+    `progress`, if given, is called with the running totals after every chunk.
+    With `shared_table` (a number of entries), all bots in all workers share
+    one SharedTranspositionTable of that size instead of starting every game
+    with an empty table of their own; results then depend on timing.
+    `record`, a path, appends every game to that game record file.
+    """
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, games // (workers * 16) or 1))
+
+    tasks = []
+    remaining = games
+    while remaining > 0:
+        count = min(chunk_size, remaining)
+        tasks.append((game_name, p1, p2, count, seed + len(tasks), time_budget, node_budget, record is not None))
+        remaining -= count
+
+    totals = [0, 0, 0, 0]
+    start = time.perf_counter()
+
+    def add(chunk):
+        chunk_totals, records = chunk
+        for i in range(4):
+            totals[i] += chunk_totals[i]
+        if writer:
+            writer.write(records)
+        if progress:
+            progress(_summary(totals, time.perf_counter() - start))
+
+    table = SharedTranspositionTable(shared_table) if shared_table else None
+    writer = RecordWriter(record) if record else None
+    try:
+        if workers > 1:
+            with Pool(workers, _init_worker, (table,)) as pool:
+                for chunk in pool.imap_unordered(run_chunk, tasks):
+                    add(chunk)
+        else:
+            _init_worker(table)
+            for task in tasks:
+                add(run_chunk(task))
+    finally:
+        _init_worker(None)
+        if table:
+            table.close()
+        if writer:
+            writer.close()
+
+    return _summary(totals, time.perf_counter() - start)
+
+
+def _summary(totals, elapsed):
+    played = totals[0] + totals[1] + totals[2]
+    return {
+        "games": played,
+        "p1_wins": totals[1],
+        "p2_wins": totals[2],
+        "draws": totals[0],
+        "avg_length": totals[3] / played if played else 0.0,
+        "elapsed": elapsed,
+        "games_per_sec": played / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _format(summary):
+    games = summary["games"] or 1
+    return (f"{summary['games']} games | "
+            f"P1 {summary['p1_wins']} ({summary['p1_wins'] / games:.1%}) | "
+            f"P2 {summary['p2_wins']} ({summary['p2_wins'] / games:.1%}) | "
+            f"draws {summary['draws']} ({summary['draws'] / games:.1%}) | "
+            f"avg length {summary['avg_length']:.1f} | "
+            f"{summary['games_per_sec']:,.0f} games/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless bot-vs-bot games.")
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--p1", default="hard", help="difficulty of the first player (easy, hard or mcts)")
+    parser.add_argument("--p2", default="easy", help="difficulty of the second player (easy, hard or mcts)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds per search move (makes results timing-dependent)")
+    parser.add_argument("--node-budget", type=int, default=1000,
+                        help="nodes per search move")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--shared-table", type=int, default=None, metavar="ENTRIES",
+                        help="share one transposition table of this many entries between all bots")
+    parser.add_argument("--record", metavar="FILE", help="append every game to this game record file")
+    args = parser.parse_args(argv)
+
+    def progress(summary):
+        sys.stdout.write("\r" + _format(summary))
+        sys.stdout.flush()
+
+    summary = simulate(args.game, args.games, args.p1, args.p2, args.workers, args.seed,
+                       args.time_budget, args.node_budget, args.chunk_size, progress, args.shared_table,
+                       args.record)
+    sys.stdout.write("\r" + _format(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import pytest
+
+import blackjack_odds
+
+
+@pytest.mark.parametrize("hand", [(11, 10), (11, 5, 5)])
+def test_soft_21_can_hit_without_busting(hand):
+    shoe = blackjack_odds.remove(blackjack_odds.full_shoe(), hand + (10,))
+    odds = blackjack_odds.hand_odds(hand, 10, shoe)
+    assert odds["hit"] > -1.0
+    assert odds["best"] == "stand"
+
+
+def test_hard_21_busts_on_any_hit():
+    hand = (10, 6, 5)
+    shoe = blackjack_odds.remove(blackjack_odds.full_shoe(), hand + (10,))
+    assert blackjack_odds.hand_odds(hand, 10, shoe)["hit"] == -1.0
@@ -0,0 +1,17 @@
+import pytest
+
+import blackjack_sim
+
+
+@pytest.mark.parametrize("penetration", [blackjack_sim.PENETRATION, 0.95])
+def test_single_deck_runs_through_the_shoe(monkeypatch, penetration):
+    # A deep cut makes hands that run past the end of a single deck common.
+    monkeypatch.setattr(blackjack_sim, "PENETRATION", penetration)
+    result = blackjack_sim.evaluate("basic", hands=20000, decks=1, vectorized=False)
+    assert result["wins"] + result["pushes"] + result["losses"] == 20000
+
+
+def test_single_deck_hitting_to_21():
+    result = blackjack_sim.evaluate(lambda total, soft, up: total < 21, hands=20000, decks=1,
+                                    vectorized=False)
+    assert result["wins"] + result["pushes"] + result["losses"] == 20000
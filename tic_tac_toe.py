@@ -1,34 +1,65 @@
 from rich.table import Table
+from rich.text import Text
 from rich import box
-from base_game import BoardGame
+import instrument
+from base_game import BoardGame, BoardView
+from transposition import zobrist_table
 
+# Renderables reused on every redraw, indexed by cell code.
+CELL_TEXT = (Text(" "), Text("X", style="bold red"), Text("O", style="bold blue"))
 
+# (dx, dy) steps of the horizontal, vertical and both diagonal lines.
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+@instrument.measured("check_winner", "make_move", "display_board")
 class TicTacToe(BoardGame):
-    def __init__(self):
+    """
+    Tic Tac Toe on a size x size board, won by `win_length` in a row
+    (by default the full side). TicTacToe(15, 5) plays Gomoku.
+    """
+    __slots__ = ("size", "win_length", "cells", "winner", "zobrist", "key")
+
+    def __init__(self, size=3, win_length=None):
         super().__init__()
-        self.board = [[" " for _ in range(3)] for _ in range(3)]
+        self.size = size
+        self.win_length = win_length or size
+        # Cell y * size + x holds 0 (empty), 1 ("X") or 2 ("O").
+        self.cells = bytearray(size * size)
+        self.winner = None
+
+        # Zobrist hash of the position, updated by place()/clear().
+        self.zobrist = zobrist_table("TicTacToe", size * size)
+        self.key = 0
+
+    @property
+    def rows(self):
+        return self.size
+
+    @property
+    def cols(self):
+        return self.size
+
+    @property
+    def board(self):
+        return BoardView(self.cells, self.size)
 
     def display_board(self, console):
-        table = Table(title="Tic Tac Toe", box=box.ROUNDED, padding=(0, 2))
+        size = self.size
+        if size == 3:
+            table = Table(title="Tic Tac Toe", box=box.ROUNDED, padding=(0, 2))
+        else:
+            table = Table(title=f"{size}x{size}, {self.win_length} in a row", box=box.ROUNDED, padding=(0, 1))
 
         table.add_column(" ", style="dim")
-        table.add_column("0", justify="center", style="bold cyan")
-        table.add_column("1", justify="center", style="bold cyan")
-        table.add_column("2", justify="center", style="bold cyan")
-
-        for i, row in enumerate(self.board):
-            row_render = [f"[bold cyan]{i}[/]"]
-
-            for cell in row:
-                if cell == "X":
-                    row_render.append("[bold red]X[/]")
-                elif cell == "O":
-                    row_render.append("[bold blue]O[/]")
-                else:
-                    row_render.append(" ")
-
-            table.add_row(*row_render)
-            if i < 2:
+        for x in range(size):
+            table.add_column(str(x), justify="center", style="bold cyan")
+
+        for y in range(size):
+            row = self.cells[y * size:(y + 1) * size]
+            table.add_row(Text(str(y), style="bold cyan"), *[CELL_TEXT[code] for code in row])
+            # Lines between rows only fit on small boards.
+            if size <= 5 and y < size - 1:
                 table.add_section()
 
         console.print(table, justify="center")
@@ -42,39 +73,120 @@ class TicTacToe(BoardGame):
 
             x, y = int(parts[0]), int(parts[1])
 
-            if not (0 <= x < 3 and 0 <= y < 3):
+            if not (0 <= x < self.size and 0 <= y < self.size):
                 print("Coordinates out of bounds.")
                 return False
 
-            if self.board[y][x] != " ":
+            if self.cells[y * self.size + x]:
                 print("Cell is already taken.")
                 return False
 
-            symbol = "X" if self.turn == 1 else "O"
-            self.board[y][x] = symbol
-            self.moves_count += 1
+            self.apply(y * self.size + x)
             return True
 
         except ValueError:
             print("Input must be numbers.")
             return False
 
-    def check_winner(self):
-        for row in self.board:
-            if "".join(row) == "XXX": return "X"
-            if "".join(row) == "OOO": return "O"
-
-        for col in zip(*self.board):
-            if "".join(col) == "XXX": return "X"
-            if "".join(col) == "OOO": return "O"
+    def place(self, x, y, symbol):
+        """Puts `symbol` on the empty cell (x, y)."""
+        code = 1 if symbol == "X" else 2
+        i = y * self.size + x
+        self.cells[i] = code
+        self.key ^= self.zobrist[code - 1][i]
+        self.moves_count += 1
+
+        if self._completes_line(x, y, code):
+            self.winner = symbol
+
+    def clear(self, x, y):
+        """Empties the cell (x, y), reverting a previous place()."""
+        i = y * self.size + x
+        code = self.cells[i]
+        self.cells[i] = 0
+        self.key ^= self.zobrist[code - 1][i]
+        self.moves_count -= 1
+
+        # A finished game can't continue, so the cleared piece was the winning one.
+        self.winner = None
+
+    def _completes_line(self, x, y, code):
+        # Only lines through the new piece can be new, so walk both ways from
+        # it in each direction: O(win_length) whatever the board size.
+        cells, size, need = self.cells, self.size, self.win_length
+        for dx, dy in DIRECTIONS:
+            run = 1
+            for sign in (1, -1):
+                cx, cy = x + sign * dx, y + sign * dy
+                while run < need and 0 <= cx < size and 0 <= cy < size and cells[cy * size + cx] == code:
+                    run += 1
+                    cx += sign * dx
+                    cy += sign * dy
+            if run >= need:
+                return True
+        return False
+
+    def legal_moves(self):
+        """Moves are cell indexes, y * size + x."""
+        if self.check_winner():
+            return []
+        return [i for i in range(len(self.cells)) if not self.cells[i]]
+
+    def search_moves(self, radius=1):
+        """
+        Moves worth searching, most central first. On boards larger than 3x3
+        only empty cells within `radius` of a piece are considered, which
+        keeps the branching factor small as the board grows.
+        """
+        size = self.size
+        center = (size - 1) / 2
+        if size == 3 or not self.history:
+            moves = [i for i in range(len(self.cells)) if not self.cells[i]]
+        else:
+            near = set()
+            for move in self.history:
+                y, x = divmod(move, size)
+                for ny in range(max(0, y - radius), min(size, y + radius + 1)):
+                    for nx in range(max(0, x - radius), min(size, x + radius + 1)):
+                        if not self.cells[ny * size + nx]:
+                            near.add(ny * size + nx)
+            moves = list(near)
+        moves.sort(key=lambda i: abs(i // size - center) + abs(i % size - center))
+        return moves
+
+    def apply(self, move):
+        y, x = divmod(move, self.size)
+        self.place(x, y, "X" if self.turn == 1 else "O")
+        self.history.append(move)
+        self.switch_turn()
+
+    def undo(self):
+        y, x = divmod(self.history.pop(), self.size)
+        self.clear(x, y)
+        self.switch_turn()
+
+    def clone(self):
+        game = TicTacToe.__new__(TicTacToe)
+        game.size = self.size
+        game.win_length = self.win_length
+        game.cells = bytearray(self.cells)
+        game.winner = self.winner
+        game.turn = self.turn
+        game.moves_count = self.moves_count
+        game.history = list(self.history)
+        game.zobrist = self.zobrist
+        game.key = self.key
+        return game
+
+    def hash(self):
+        # Whose turn it is follows from the pieces, so the Zobrist key suffices.
+        return self.key
 
-        diag1 = self.board[0][0] + self.board[1][1] + self.board[2][2]
-        diag2 = self.board[0][2] + self.board[1][1] + self.board[2][0]
-
-        if diag1 == "XXX" or diag2 == "XXX": return "X"
-        if diag1 == "OOO" or diag2 == "OOO": return "O"
+    def check_winner(self):
+        if self.winner:
+            return self.winner
 
-        if self.moves_count == 9:
+        if self.moves_count == len(self.cells):
             return "Tie"
 
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,190 @@
+import random
+from collections import OrderedDict
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Fixed seed so every process (and every run) hashes a position to the same key.
+ZOBRIST_SEED = 0x5EED2210
+
+# Added to the seed per game, so that boards of different games with the
+# same number of cells get unrelated keys. Connect Four's is 0, the keys its
+# opening book was built with.
+GAME_SALTS = {"ConnectFour": 0, "TicTacToe": 1 << 32}
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(game, cells, pieces=2, seed=ZOBRIST_SEED):
+    """
+    Returns `pieces` lists of `cells` random 64-bit keys, one key per (piece,
+    cell), for boards of `game` (a GAME_SALTS name). Tables are cached and
+    shared, so callers must not modify them.
+    """
+    rng = random.Random(seed + GAME_SALTS[game] + cells)
+    return [[rng.getrandbits(64) for _ in range(cells)] for _ in range(pieces)]
+
+
+# Scores depend on which side the bot plays, so searches for "O" xor this
+# into their keys to keep their entries apart from searches for "X".
+PERSPECTIVE_KEY = random.Random(ZOBRIST_SEED + 1).getrandbits(64)
+
+
+def perspective_key(bot_symbol):
+    return 0 if bot_symbol == "X" else PERSPECTIVE_KEY
+
+
+class TranspositionTable:
+    """
+    Bounded position cache keyed by Zobrist hash.
+
+    Each entry holds (depth, score, flag, move), where flag says whether the
+    score is EXACT, a LOWER bound or an UPPER bound. An existing entry is only
+    overwritten by a search at least as deep, and once the table is full the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, capacity=1 << 17):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, depth, score, flag, move=None):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if depth >= entry[0]:
+                self.entries[key] = (depth, score, flag, move)
+            self.entries.move_to_end(key)
+            return
+
+        if len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = (depth, score, flag, move)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, so that searches in different
+    processes (AIPlayer(table=...) in pool workers) read and write one cache.
+    The creating process owns the memory; pickling the table (e.g. passing it
+    to a Pool initializer) attaches the receiving process to the same block.
+
+    The table is `capacity` fixed 16-byte entries in two-entry buckets. The
+    first entry of a bucket keeps the deepest search, the second takes
+    whatever the first refuses. Each entry is two 64-bit words, `key ^ data`
+    and `data`, with data packing (score, move, depth, flag). There are no
+    locks: if two processes write an entry at once and a reader sees half of
+    each, the words no longer xor to the key and the read is just a miss.
+
+    Same interface as TranspositionTable, except that stats() leaves out the
+    size (see size()). Hits and misses are counted per process.
+    """
+
+    def __init__(self, capacity=1 << 20, name=None):
+        # Power of two, so a key's bucket is key & mask.
+        self.capacity = 1 << max(1, (capacity - 1).bit_length())
+        self.mask = self.capacity - 2
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.capacity * 16)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.words = self.memory.buf.cast("Q")
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __reduce__(self):
+        return SharedTranspositionTable, (self.capacity, self.memory.name)
+
+    def lookup(self, key):
+        words = self.words
+        i = 2 * (key & self.mask)
+        data = words[i + 1]
+        if not data or words[i] ^ data != key:
+            data = words[i + 3]
+            if not data or words[i + 2] ^ data != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        score = data >> 32
+        if score >= 1 << 31:
+            score -= 1 << 32
+        move = (data >> 16) & 0xFFFF
+        return (data >> 8) & 0xFF, score, (data >> 1) & 0x7F, move - 1 if move else None
+
+    def store(self, key, depth, score, flag, move=None):
+        words = self.words
+        slot = key & self.mask
+        # score: 32 bits, move + 1: 16 bits (0 for none), depth: 8, flag: 7, then a "used" bit.
+        data = ((score & 0xFFFFFFFF) << 32 | (0 if move is None else move + 1) << 16
+                | min(depth, 0xFF) << 8 | flag << 1 | 1)
+        first = words[2 * slot + 1]
+        if first and depth < (first >> 8) & 0xFF:
+            if words[2 * slot] ^ first == key:
+                return  # keep the deeper search of this position
+            slot += 1
+            second = words[2 * slot + 1]
+            if second and words[2 * slot] ^ second == key and depth < (second >> 8) & 0xFF:
+                return
+        words[2 * slot] = key ^ data
+        words[2 * slot + 1] = data
+        self.stores += 1
+
+    def clear(self):
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+
+    def size(self):
+        """Number of entries in use (a full scan, so not part of stats())."""
+        return self.capacity - self.words[1::2].tolist().count(0)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Detaches this process; the owner also frees the memory."""
+        if self.words is None:
+            return
+        self.words.release()
+        self.words = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,198 @@
+"""
+Solved Tic Tac Toe table.
+
+Every position reachable from the empty board is solved once at import time
+and stored under its canonical encoding: the smallest base-3 code among its
+8 rotations/reflections. Scores follow AIPlayer._minimax: a win n plies away
+(counting the move itself) is worth 11 - n, a loss -(11 - n) and a draw 0.
+
+Run `python ttt_table.py` to check the table against AIPlayer._minimax on
+every reachable position.
+"""
+
+CELL_CODES = {" ": 0, "X": 1, "O": 2}
+POWERS = [3 ** i for i in range(9)]
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6)]
+
+
+def _symmetries():
+    # SYMMETRIES[s][i] is the cell that cell i is moved to by symmetry s.
+    def rotate(i):
+        y, x = divmod(i, 3)
+        return x * 3 + (2 - y)
+
+    def reflect(i):
+        y, x = divmod(i, 3)
+        return y * 3 + (2 - x)
+
+    result = []
+    perm = list(range(9))
+    for _ in range(4):
+        result.append(perm)
+        result.append([reflect(p) for p in perm])
+        perm = [rotate(p) for p in perm]
+    return result
+
+
+SYMMETRIES = _symmetries()
+
+# canonical code -> best move (cell index in the canonical frame) * 32 + score + 16
+TABLE = {}
+
+
+def _winner(cells):
+    for a, b, c in LINES:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+
+def canonical(cells):
+    """Returns (canonical code, symmetry index) for a flat list of cell codes."""
+    best_code = None
+    best_sym = 0
+    for s, perm in enumerate(SYMMETRIES):
+        code = 0
+        for i in range(9):
+            if cells[i]:
+                code += cells[i] * POWERS[perm[i]]
+        if best_code is None or code < best_code:
+            best_code = code
+            best_sym = s
+    return best_code, best_sym
+
+
+def _decode(code):
+    cells = []
+    for _ in range(9):
+        code, digit = divmod(code, 3)
+        cells.append(digit)
+    return cells
+
+
+def _solve(cells, symbol):
+    """Fills TABLE for this position and everything below it; returns its score."""
+    code, _ = canonical(cells)
+    entry = TABLE.get(code)
+    if entry is not None:
+        return (entry & 31) - 16
+
+    # Solve in the canonical frame so the stored move needs no remapping.
+    cells = _decode(code)
+    other = 3 - symbol
+    best_score = None
+    best_move = 0
+
+    for i in range(9):
+        if cells[i]:
+            continue
+
+        cells[i] = symbol
+        if _winner(cells):
+            score = 10
+        elif 0 not in cells:
+            score = 0
+        else:
+            # Scores shrink towards zero by one for every ply further away.
+            child = _solve(cells, other)
+            if child > 0:
+                score = -child + 1
+            elif child < 0:
+                score = -child - 1
+            else:
+                score = 0
+        cells[i] = 0
+
+        if best_score is None or score > best_score:
+            best_score = score
+            best_move = i
+
+    TABLE[code] = best_move * 32 + best_score + 16
+    return best_score
+
+
+def _flatten(board):
+    return [CELL_CODES[cell] for row in board for cell in row]
+
+
+def lookup(board):
+    """
+    Returns (x, y, score) of a perfect move for the side to move on a 3x3
+    `board`, or None if the game is already over.
+    """
+    cells = _flatten(board)
+    if _winner(cells) or 0 not in cells:
+        return None
+
+    code, sym = canonical(cells)
+    entry = TABLE[code]
+    canonical_move = entry >> 5
+    perm = SYMMETRIES[sym]
+    move = perm.index(canonical_move)
+    y, x = divmod(move, 3)
+    return x, y, (entry & 31) - 16
+
+
+def verify():
+    """
+    Checks that, on every reachable position, the table's move scores as well
+    under AIPlayer._minimax as the best move minimax finds, and that the stored
+    score equals that best score. Returns the number of positions checked.
+    """
+    from ai_player import AIPlayer
+    from tic_tac_toe import TicTacToe
+
+    bot = AIPlayer("hard")
+    symbols = {0: " ", 1: "X", 2: "O"}
+    checked = 0
+    seen = set()
+    stack = [[0] * 9]
+
+    while stack:
+        cells = stack.pop()
+        code = sum(cells[i] * POWERS[i] for i in range(9))
+        if code in seen or _winner(cells) or 0 not in cells:
+            continue
+        seen.add(code)
+
+        game = TicTacToe()
+        for i in range(9):
+            if cells[i]:
+                y, x = divmod(i, 3)
+                game.place(x, y, symbols[cells[i]])
+
+        bot_code = 1 if cells.count(1) == cells.count(2) else 2
+        bot_symbol = symbols[bot_code]
+        opp_symbol = symbols[3 - bot_code]
+        game.turn = 1 if bot_code == 1 else -1
+
+        scores = {}
+        for move in game.legal_moves():
+            y, x = divmod(move, 3)
+            game.apply(move)
+            scores[(x, y)] = bot._minimax(game, 0, False, bot_symbol, opp_symbol)
+            game.undo()
+
+            child = list(cells)
+            child[move] = bot_code
+            stack.append(child)
+
+        x, y, score = lookup(game.board)
+        best = max(scores.values())
+        if scores[(x, y)] != best or score != best:
+            raise AssertionError(f"Table disagrees with minimax on {game.board}: "
+                                 f"move {(x, y)} scores {scores[(x, y)]}, table says {score}, best is {best}")
+        checked += 1
+
+    return checked
+
+
+_solve([0] * 9, 1)
+
+
+if __name__ == "__main__":
+    print(f"{len(TABLE)} canonical positions in the table.")
+    print(f"Table agrees with minimax on all {verify()} reachable positions.")